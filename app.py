@@ -2,18 +2,18 @@ import streamlit as st
 
 # Custom imports 
 from utils.multipage import MultiPage
-from pages import home, dataset, analysis, case, references, linear_regression
 
 # Create an instance of the app 
 app = MultiPage()
 
-# Add all your applications (pages) here
-app.add_page("Home", home.app)
-app.add_page("Dataset", dataset.app)
-app.add_page("Analysis", analysis.app)
-app.add_page("Case Studies", case.app)
-app.add_page("Prediction", linear_regression.app)
-app.add_page("References", references.app)
+# Add all your applications (pages) here, by module path so each one is
+# only imported the first time somebody opens it
+app.add_page("Home", "pages.home")
+app.add_page("Dataset", "pages.dataset")
+app.add_page("Analysis", "pages.analysis")
+app.add_page("Case Studies", "pages.case")
+app.add_page("Prediction", "pages.linear_regression")
+app.add_page("References", "pages.references")
 
 # The main app
 app.run()
@@ -0,0 +1,91 @@
+"""
+Per-call cost of a cache hit: legacy st.cache vs. fingerprint-keyed memoize.
+
+The legacy path is the old ``@st.cache filter_df_by_continent(df, df_pivot,
+region)``, which hashes both frames on every call and, unless output
+mutation is allowed, re-hashes the returned frames to detect mutation. The
+new path looks the result up under (dataset fingerprints, region). The panel
+can be replicated to show how each scales with data size.
+
+Run from the repository root:
+    python benchmarks/cache_hashing.py [--scales 1 10 100] [--calls N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+import streamlit as st
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.constants import *
+from utils.dataloader import DataStore, get_store
+from utils.memo import memoize
+
+
+@st.cache()
+def legacy_checked(df, df_pivot, region):
+    return df[df[REGION] == region], df_pivot[df_pivot[REGION] == region]
+
+
+@st.cache(allow_output_mutation=True)
+def legacy_unchecked(df, df_pivot, region):
+    return df[df[REGION] == region], df_pivot[df_pivot[REGION] == region]
+
+
+@st.cache(allow_output_mutation=True)
+def legacy_get_store():
+    return DataStore()
+
+
+@memoize('facts', 'facts_pivot')
+def memoized(store, region):
+    df, df_pivot = store.facts, store.facts_pivot
+    return df[df[REGION] == region], df_pivot[df_pivot[REGION] == region]
+
+
+def per_call(func, *args, calls):
+    func(*args)  # populate
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore")
+
+    base = get_store()
+    print(f"{'rows':>8} {'st.cache':>12} {'st.cache':>14} {'memoize':>10}   (us per cache hit)")
+    print(f"{'':>8} {'(checked)':>12} {'(no mutation)':>14}")
+    for scale in args.scales:
+        store = DataStore()
+        store._frames.update(base._frames)
+        store._seconds.update(base._seconds)
+        if scale > 1:
+            for name in ('facts', 'facts_pivot'):
+                store._frames[name] = pd.concat([base.get(name)] * scale)
+        df, df_pivot = store.facts, store.facts_pivot
+
+        checked = per_call(legacy_checked, df, df_pivot, "Europe", calls=args.calls)
+        unchecked = per_call(legacy_unchecked, df, df_pivot, "Europe", calls=args.calls)
+        memo = per_call(memoized, store, "Europe", calls=args.calls)
+        print(f"{len(df):>8} {checked:>12.1f} {unchecked:>14.1f} {memo:>10.1f}")
+
+    legacy = per_call(legacy_get_store, calls=args.calls)
+    singleton = per_call(get_store, calls=args.calls)
+    print(f"get_store: st.cache {legacy:.1f} us, module singleton {singleton:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
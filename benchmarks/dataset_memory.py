@@ -0,0 +1,45 @@
+"""
+Memory held by each DataStore dataset, as read or built vs. as stored.
+
+Loads every dataset (the union of what the pages use) and prints its deep
+memory before and after utils.compact, plus the totals. Only source datasets
+have a size before compaction: built datasets are built from compacted
+inputs, so they are listed by stored size and left out of the ratio. Run with
+COMPACT_DATASETS=0 to see the uncompacted store.
+
+Run from the repository root:
+    python benchmarks/dataset_memory.py
+"""
+
+import logging
+import os
+import sys
+import warnings
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dataloader import DataStore
+
+
+def main():
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore")
+
+    store = DataStore()
+    store.prefetch()
+    stats = store.stats().sort_values(["raw_bytes", "bytes"], ascending=False)
+    stats["ratio"] = stats["bytes"] / stats["raw_bytes"]
+
+    with pd.option_context("display.width", 120):
+        print(stats[["dataset", "rows", "raw_bytes", "bytes", "ratio"]].to_string(index=False))
+    sources = stats[stats["raw_bytes"].notna()]
+    raw, stored = sources["raw_bytes"].sum(), sources["bytes"].sum()
+    built = stats.loc[stats["raw_bytes"].isna(), "bytes"].sum()
+    print(f"sources: {raw / 1e6:.2f} MB as read, {stored / 1e6:.2f} MB stored ({stored / raw:.0%})")
+    print(f"built: {built / 1e6:.2f} MB stored")
+
+
+if __name__ == "__main__":
+    main()
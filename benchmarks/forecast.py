@@ -0,0 +1,79 @@
+"""
+Trend forecasts: one np.polyfit per country vs. the batched solve of
+utils.forecast, as the number of countries grows.
+
+Larger panels are the real one replicated under renamed countries, with a
+little noise on the scores. Both paths compute the same slope, mean forecast
+and prediction interval; the largest difference between them is printed.
+
+Run from the repository root:
+    python benchmarks/forecast.py [--scales 1 10 100] [--horizon 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.constants import *
+from utils.dataloader import get_store
+from utils.forecast import TrendForecast
+
+
+def loop_forecast(happiness, horizon, level=0.95):
+    years = np.arange(happiness[YEAR].max() + 1, happiness[YEAR].max() + 1 + horizon)
+    forecasts = {}
+    for country, group in happiness.groupby(COUNTRY, observed=True):
+        x = group[YEAR].to_numpy(dtype=float)
+        y = group[HAPPINESS_SCORE].to_numpy(dtype=float)
+        if len(x) < 3:
+            continue
+        slope, intercept = np.polyfit(x, y, 1)
+        residuals = y - (slope * x + intercept)
+        variance = residuals @ residuals / (len(x) - 2)
+        mean = slope * years + intercept
+        spread = np.sqrt(variance * (1 + 1 / len(x) + (years - x.mean()) ** 2 / ((x - x.mean()) ** 2).sum()))
+        half_width = stats.t.ppf(0.5 + level / 2, len(x) - 2) * spread
+        forecasts[country] = (mean, mean - half_width, mean + half_width)
+    return forecasts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--horizon", type=int, default=3)
+    args = parser.parse_args()
+
+    base = get_store().happiness[[COUNTRY, YEAR, HAPPINESS_SCORE]].dropna()
+    base = base.assign(**{COUNTRY: base[COUNTRY].astype(str)})
+    rng = np.random.default_rng(0)
+
+    print(f"{'countries':>10} {'loop ms':>9} {'batched ms':>11} {'max diff':>9}")
+    for scale in args.scales:
+        df = pd.concat(base.assign(**{COUNTRY: base[COUNTRY] + f" #{i}"}) for i in range(scale))
+        if scale > 1:
+            df[HAPPINESS_SCORE] += rng.normal(0, 0.01, len(df))
+
+        start = time.perf_counter()
+        looped = loop_forecast(df, args.horizon)
+        loop_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        forecast = TrendForecast(df, horizon=args.horizon)
+        batched_ms = (time.perf_counter() - start) * 1000
+
+        diff = max(
+            np.abs(np.stack(expected) - np.stack([forecast.mean[i], forecast.lower[i], forecast.upper[i]])).max()
+            for i, expected in ((forecast.rows[country], expected) for country, expected in looped.items())
+        )
+        print(f"{len(forecast):>10} {loop_ms:>9.1f} {batched_ms:>11.1f} {diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
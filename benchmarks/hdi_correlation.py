@@ -0,0 +1,65 @@
+"""
+HDI threshold slider: isin + DataFrame.corr vs. the prefix-sum engine.
+
+The panel can be replicated to see how both approaches scale with rows.
+
+Run from the repository root:
+    python benchmarks/hdi_correlation.py [--scale N] [--thresholds N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.constants import *
+from utils.correlation import ThresholdCorrelation
+from utils.dataloader import get_store
+
+
+def pandas_split(facts, hdi, threshold):
+    developed = list(hdi[hdi["hdi2019"] >= threshold][COUNTRY])
+    developing = list(hdi[hdi["hdi2019"] < threshold][COUNTRY])
+    facts[facts[COUNTRY].isin(developed)].corr()
+    facts[facts[COUNTRY].isin(developing)].corr()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="replicate the panel N times")
+    parser.add_argument("--thresholds", type=int, default=50)
+    args = parser.parse_args()
+
+    store = get_store()
+    facts, hdi = store.facts, store.hdi
+    if args.scale > 1:
+        facts = pd.concat([facts] * args.scale)
+    thresholds = np.linspace(0.5, 0.8, args.thresholds)
+
+    start = time.perf_counter()
+    for threshold in thresholds:
+        pandas_split(facts, hdi, threshold)
+    per_pandas = (time.perf_counter() - start) / len(thresholds)
+
+    start = time.perf_counter()
+    engine = ThresholdCorrelation(facts, hdi)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for threshold in thresholds:
+        engine.corr("Whole World", threshold)
+    per_engine = (time.perf_counter() - start) / len(thresholds)
+
+    print(f"rows: {len(facts)}")
+    print(f"isin + corr per slider move: {per_pandas * 1000:.2f} ms")
+    print(f"engine build (once):         {build * 1000:.2f} ms")
+    print(f"engine per slider move:      {per_engine * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
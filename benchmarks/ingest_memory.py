@@ -0,0 +1,84 @@
+"""
+Peak memory of chunked ingestion vs. loading a happiness panel whole.
+
+The WHR sheet is replicated under renamed countries into CSVs of growing
+size. Each is then, in a fresh interpreter, either read whole with
+pd.read_csv and year-filtered afterwards (the old load path) or streamed
+through utils.ingest. Chunked peak RSS should stay flat as the input grows.
+
+Run from the repository root:
+    python benchmarks/ingest_memory.py [--scales 10 100 300] [--chunksize N]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(variant, src, out, chunksize):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import pandas as pd
+    from utils.constants import YEAR
+    from utils.ingest import SOURCE_COLUMNS, ingest
+
+    if variant == "make":
+        # chunksize is the replication factor here
+        base = pd.read_excel("data/HappinessScores.xls")
+        return pd.concat(
+            base.assign(**{"Country name": base["Country name"] + f" #{i}"}) for i in range(chunksize)
+        ).to_csv(src, index=False)
+
+    start = time.perf_counter()
+    if variant == "whole":
+        df = pd.read_csv(src).rename(columns=SOURCE_COLUMNS)
+        rows = int(df[YEAR].between(2005, 2020).sum())
+    else:
+        rows, _ = ingest(src, out, chunksize=chunksize)
+    seconds = time.perf_counter() - start
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"rows": rows, "seconds": seconds, "rss_mb": rss_mb}))
+
+
+def measure(variant, src, out, chunksize):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", variant, src, out, str(chunksize)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        variant, src, out, chunksize = args.child
+        return child(variant, src, out, int(chunksize))
+
+    # Children inherit the parent's peak RSS, so the parent never holds a large frame
+    with tempfile.TemporaryDirectory() as tmp:
+        src, out = os.path.join(tmp, "panel.csv"), os.path.join(tmp, "store")
+        print(f"{'rows':>9} {'whole MB':>9} {'chunked MB':>11} {'whole s':>8} {'chunked s':>10}")
+        for scale in args.scales:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "make", src, out, str(scale)],
+                cwd=ROOT, check=True,
+            )
+            whole = measure("whole", src, out, args.chunksize)
+            chunked = measure("chunked", src, out, args.chunksize)
+            print(f"{whole['rows']:>9} {whole['rss_mb']:>9.0f} {chunked['rss_mb']:>11.0f} "
+                  f"{whole['seconds']:>8.2f} {chunked['seconds']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Analysis page headlines: pivot scans vs. the precomputed leaderboard.
+
+The old headlines ran set_index, idxmax/idxmin and a row mean over the
+pivot on every rerun; the leaderboard answers the same four questions with
+array slices. The pivot can be replicated (under renamed countries) to see
+how each scales.
+
+Run from the repository root:
+    python benchmarks/leaderboard.py [--scale N] [--runs N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.constants import *
+from utils.dataloader import get_store
+from utils.leaderboard import AVERAGE, WORLD, Leaderboard
+
+
+def pivot_headlines(df_pivot):
+    most19 = df_pivot.set_index(COUNTRY).select_dtypes(np.number).idxmax()[2019]
+    least19 = df_pivot.set_index(COUNTRY).select_dtypes(np.number).idxmin()[2019]
+    most_avg = df_pivot.set_index(COUNTRY).mean(axis=1).idxmax()
+    least_avg = df_pivot.set_index(COUNTRY).mean(axis=1).idxmin()
+    return most19, least19, most_avg, least_avg
+
+
+def leaderboard_headlines(leaderboard):
+    most19, _ = leaderboard.best(WORLD, 2019)
+    least19, _ = leaderboard.worst(WORLD, 2019)
+    most_avg, _ = leaderboard.best(WORLD, AVERAGE)
+    least_avg, _ = leaderboard.worst(WORLD, AVERAGE)
+    return most19, least19, most_avg, least_avg
+
+
+def per_call(func, *args, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(*args)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="replicate the pivot N times")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    df_pivot = get_store().facts_pivot
+    if args.scale > 1:
+        df_pivot = pd.concat(
+            df_pivot.assign(**{COUNTRY: df_pivot[COUNTRY].astype(str) + f" #{i}"}) for i in range(args.scale)
+        )
+
+    start = time.perf_counter()
+    leaderboard = Leaderboard(df_pivot)
+    build = (time.perf_counter() - start) * 1000
+
+    print(f"countries: {len(df_pivot)}")
+    print(f"pivot scans per rerun:     {per_call(pivot_headlines, df_pivot, runs=args.runs):.3f} ms")
+    print(f"leaderboard build (once):  {build:.3f} ms")
+    print(f"leaderboard per rerun:     {per_call(leaderboard_headlines, leaderboard, runs=args.runs):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Headless benchmark of every page's app().
+
+Each page runs in a fresh interpreter with Streamlit in bare mode (elements
+are no-ops without a script context) and its input widgets stubbed to return
+chosen values. Per page it records:
+
+- cold: first app() call, so the in-memory caches are empty (on-disk
+  snapshots are used unless --cold-snapshots)
+- warm: a second, unchanged rerun
+- peak_rss_mb: process high-water mark after the cold run
+- warm_peak_alloc_mb: peak Python/numpy allocation during a warm rerun
+- interactions: rerun time after changing one widget, per widget and value
+
+Results are written as JSON. With --compare, timings slower than the
+baseline by more than --tolerance are reported and the exit code is 1.
+
+Run from the repository root:
+    python benchmarks/page_suite.py [--out page_suite.json] [--pages analysis pca]
+        [--repeat N] [--cold-snapshots] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.constants import *
+
+PAGES = ["home", "dataset", "analysis", "case", "linear_regression", "pca"]
+
+# Widget label -> values to step through, per page
+INTERACTIONS = {
+    "analysis": {
+        "Continent": ["Whole World"] + REGION_LIST,
+        "HDI Score Threshold": [0.5, 0.6, 0.7, 0.8],
+        "Quality of Life Factors": [LOG_GDP, SOCIAL_SUPPORT, LIFE_EXPECTANCY, FREEDOM, GENEROSITY, CORRUPTION],
+    },
+    "linear_regression": {
+        GDP: [1000, 5000, 20000, 80000],
+        SOCIAL_SUPPORT: [2, 5, 9],
+        LIFE_EXPECTANCY: [40, 60, 80],
+        FREEDOM: [2, 5, 9],
+        GENEROSITY: [0, 3, 6],
+        CORRUPTION: [2, 5, 9],
+    },
+}
+
+
+def stub_widgets(values):
+    """Make Streamlit's input widgets return values[label] or their default."""
+    import streamlit as st
+    from streamlit.delta_generator import DeltaGenerator
+
+    def choice(label, options, index=0, *args, **kwargs):
+        return values.get(label, options[index])
+
+    def slider(label, min_value=None, max_value=None, value=None, *args, **kwargs):
+        return values.get(label, min_value if value is None else value)
+
+    for name, func in {"radio": choice, "selectbox": choice, "slider": slider}.items():
+        setattr(st, name, func)
+        setattr(DeltaGenerator, name, lambda self, *args, _func=func, **kwargs: _func(*args, **kwargs))
+
+
+def timed(app):
+    start = time.perf_counter()
+    app()
+    return time.perf_counter() - start
+
+
+def child(page, repeat):
+    os.chdir(ROOT)
+    import logging
+    import warnings
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+
+    values = {}
+    stub_widgets(values)
+    import importlib
+    app = importlib.import_module("pages." + page).app
+
+    result = {"cold": timed(app)}
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result["warm"] = min(timed(app) for _ in range(repeat))
+
+    tracemalloc.start()
+    app()
+    result["warm_peak_alloc_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    interactions = {}
+    for label, options in INTERACTIONS.get(page, {}).items():
+        times = []
+        for _ in range(repeat):
+            for value in options:
+                values[label] = value
+                times.append(timed(app))
+        values.pop(label)
+        interactions[label] = {"median": statistics.median(times), "max": max(times), "n": len(times)}
+    result["interactions"] = interactions
+    print(json.dumps(result))
+
+
+def run_page(page, repeat, snapshot_dir):
+    env = dict(os.environ)
+    if snapshot_dir:
+        env["SNAPSHOT_DIR"] = snapshot_dir
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", page, "--repeat", str(repeat)],
+        env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def timings(results):
+    """Flatten to {"page.metric": seconds} for comparison."""
+    flat = {}
+    for page, result in results["pages"].items():
+        flat[f"{page}.cold"] = result["cold"]
+        flat[f"{page}.warm"] = result["warm"]
+        for label, stats in result["interactions"].items():
+            flat[f"{page}.{label}"] = stats["median"]
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    current, previous = timings(results), timings(baseline)
+    for key, seconds in current.items():
+        before = previous.get(key)
+        if before and seconds > before * (1 + tolerance):
+            regressions.append(key)
+            print(f"REGRESSION {key}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="page_suite.json")
+    parser.add_argument("--pages", nargs="+", default=PAGES, choices=PAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cold-snapshots", action="store_true", help="start every page from an empty snapshot dir")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. the baseline")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.repeat)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "pages": {},
+    }
+    for page in args.pages:
+        snapshot_dir = tempfile.mkdtemp(prefix="snapshots-") if args.cold_snapshots else None
+        try:
+            result = run_page(page, args.repeat, snapshot_dir)
+        finally:
+            if snapshot_dir:
+                shutil.rmtree(snapshot_dir)
+        results["pages"][page] = result
+        print(f"{page:>18}: cold {result['cold'] * 1000:8.1f} ms  warm {result['warm'] * 1000:8.1f} ms  "
+              f"rss {result['peak_rss_mb']:6.0f} MB  warm alloc {result['warm_peak_alloc_mb']:6.1f} MB")
+        for label, stats in result["interactions"].items():
+            print(f"{'':>20}{label}: {stats['median'] * 1000:.1f} ms median, {stats['max'] * 1000:.1f} ms max")
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+PCA modes: exact eigh vs. incremental (one batch per wave) vs. randomized SVD,
+on the real panel and on a synthetic wide feature matrix, plus the cost of a
+cached page rerun.
+
+Run from the repository root:
+    python benchmarks/pca_modes.py [--rows N] [--features N] [--components N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dataloader import get_store
+from utils.pca import IncrementalPCA, cached_projection, fit_exact, fit_randomized, prepare_features
+
+
+def timed(func, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def report(label, X, k, batches):
+    t_exact, exact = timed(lambda: fit_exact(X, k))
+    t_rand, rand = timed(lambda: fit_randomized(X, k))
+
+    def incremental():
+        ipca = IncrementalPCA(X.shape[1])
+        for batch in np.array_split(X, batches):
+            ipca.partial_fit(batch)
+        return ipca
+
+    t_inc, ipca = timed(incremental)
+    # Folding in one more wave vs. refitting everything
+    wave = X[: max(1, len(X) // batches)]
+    t_fold, _ = timed(lambda: ipca.partial_fit(wave).result(k), repeat=1)
+
+    print(f"{label}: {X.shape[0]} rows x {X.shape[1]} features, {k} components")
+    print(f"  exact (cov + eigh):      {t_exact * 1000:9.2f} ms")
+    print(f"  incremental ({batches} batches): {t_inc * 1000:9.2f} ms")
+    print(f"  fold in one more wave:   {t_fold * 1000:9.2f} ms")
+    print(f"  randomized SVD:          {t_rand * 1000:9.2f} ms")
+    print(f"  max |ratio diff| randomized vs exact: "
+          f"{np.abs(rand.explained_variance_ratio - exact.explained_variance_ratio).max():.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--features", type=int, default=500)
+    parser.add_argument("--components", type=int, default=3)
+    args = parser.parse_args()
+
+    store = get_store()
+    scaled, _ = prepare_features(store.happiness, store.countries)
+    report("WHR panel", scaled.to_numpy(), args.components, batches=10)
+
+    # Low-rank signal plus noise, the case randomized SVD is meant for
+    rng = np.random.default_rng(0)
+    latent = rng.standard_normal((args.rows, 10))
+    X = latent @ rng.standard_normal((10, args.features)) + 0.1 * rng.standard_normal((args.rows, args.features))
+    report("synthetic", X, args.components, batches=10)
+
+    t_first, _ = timed(lambda: cached_projection(store), repeat=1)
+    t_rerun, _ = timed(lambda: cached_projection(store), repeat=100)
+    print("page")
+    print(f"  first fit + projection:  {t_first * 1000:9.2f} ms")
+    print(f"  cached rerun:            {t_rerun * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Prediction page: per-interaction latency of the old refit + linear scan vs.
+the cached model with a binary-search lookup, as the panel grows.
+
+Larger panels are the real one replicated with a little noise on the scores.
+The old path is only timed up to --scan-limit rows.
+
+Run from the repository root:
+    python benchmarks/regression_lookup.py [--sizes 1 100 1000] [--scan-limit 50000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.constants import *
+from utils.dataloader import get_store
+from utils.pca import FEATURES
+from utils.regression import HappinessModel
+
+INPUTS = [np.log(12858), 0.8, 60, 0.7, 0.1, 0.8]
+
+
+def old_interaction(df_raw):
+    df = df_raw[FEATURES]
+    reg = LinearRegression().fit(np.array(df), np.array(df_raw[HAPPINESS_SCORE]))
+    predicted_val = reg.predict(np.array([INPUTS]))
+    predict_country = df_raw[[COUNTRY, HAPPINESS_SCORE]].reset_index()
+    scores = predict_country[HAPPINESS_SCORE]
+    min_val = 1000
+    for i in range(len(scores)):
+        dist = np.sqrt((predicted_val - scores[i]) ** 2)
+        if dist < min_val:
+            min_val = dist
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000],
+                        help="replication factors of the panel")
+    parser.add_argument("--scan-limit", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    happiness = get_store().happiness
+    base = happiness[[COUNTRY] + FEATURES + [HAPPINESS_SCORE]].dropna()
+    rng = np.random.default_rng(0)
+
+    print(f"{'rows':>10} {'old ms':>10} {'build ms':>10} {'per move us':>12}")
+    for scale in args.sizes:
+        df = pd.concat([base] * scale, ignore_index=True)
+        if scale > 1:
+            df[HAPPINESS_SCORE] += rng.normal(0, 0.01, len(df))
+
+        old = float("nan")
+        if len(df) <= args.scan_limit:
+            start = time.perf_counter()
+            old_interaction(df)
+            old = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        model = HappinessModel(df)
+        build = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            model.nearest(model.predict(INPUTS))
+        per_move = (time.perf_counter() - start) / args.repeat * 1e6
+
+        print(f"{len(df):>10} {old:>10.2f} {build:>10.2f} {per_move:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
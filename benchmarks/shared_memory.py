@@ -0,0 +1,96 @@
+"""
+Host memory of N app processes: private datasets vs. shared memory-mapped ones.
+
+Each child process loads every DataStore dataset, as the pages would, then
+waits while the parent reads its memory from /proc/<pid>/smaps_rollup:
+
+- RSS counts every resident page, shared or not, so summing it over
+  processes counts shared pages N times.
+- PSS splits each shared page between the processes mapping it, so the sum
+  over processes is what the host actually spends.
+
+Variants: "idle" only imports the loader (the interpreter and library
+floor), "private" keeps a copy of each dataset per process, and "shared"
+sets SHARED_DATASETS so processes attach to frames published once.
+
+Linux only. Run from the repository root:
+    python benchmarks/shared_memory.py [--processes 1 4 8]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(variant):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import logging
+    import warnings
+    logging.disable(logging.CRITICAL)
+    warnings.filterwarnings("ignore")
+    from utils.dataloader import DataStore
+
+    store = DataStore()
+    if variant != "idle":
+        store.prefetch(workers=1)
+    print("ready", flush=True)
+    sys.stdin.read()
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                fields[parts[0][:-1]] = int(parts[1])
+    return fields
+
+
+def measure(variant, n, env):
+    procs = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--child", variant],
+            cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(n)
+    ]
+    try:
+        for proc in procs:
+            proc.stdout.readline()
+        usage = [memory_kb(proc.pid) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+    return sum(u["Rss"] for u in usage) / 1024, sum(u["Pss"] for u in usage) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        private = {k: v for k, v in os.environ.items() if k != "SHARED_DATASETS"}
+        shared = dict(private, SHARED_DATASETS=tmp)
+        # Warm the snapshots and publish the shared files before measuring
+        measure("private", 1, shared)
+
+        print(f"{'processes':>9} {'variant':>8} {'sum RSS MB':>11} {'sum PSS MB':>11}")
+        for n in args.processes:
+            for variant, env in [("idle", private), ("private", private), ("shared", shared)]:
+                rss, pss = measure(variant, n, env)
+                print(f"{n:>9} {variant:>8} {rss:>11.1f} {pss:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Prediction page: k most similar country-years by a brute-force scan vs. the
+KD-tree of utils.neighbors, as the panel grows.
+
+Larger panels are the real one replicated with a little noise on the
+features, standing in for subnational rows. Both paths search the same
+standardized space; the scan computes every distance and partitions them.
+
+Run from the repository root:
+    python benchmarks/similar_countries.py [--sizes 1 100 1000] [--k 5] [--batch 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.constants import *
+from utils.dataloader import get_store
+from utils.neighbors import NeighborIndex
+from utils.pca import FEATURES
+
+INPUTS = [np.log(12858), 0.8, 60, 0.7, 0.1, 0.8]
+
+
+def scan(index, points, X, k):
+    Z = (np.atleast_2d(X) - index.mean) / index.scale
+    distances = ((points[None, :, :] - Z[:, None, :]) ** 2).sum(axis=2)
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(distances, nearest, axis=1)
+
+
+def per_call(func, *args, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(*args)
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000],
+                        help="replication factors of the panel")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=1000, help="queries per batched call")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    base = get_store().happiness[[COUNTRY, YEAR] + FEATURES + [HAPPINESS_SCORE]].dropna()
+    rng = np.random.default_rng(0)
+    queries = base[FEATURES].sample(args.batch, replace=True, random_state=0).to_numpy(dtype=float)
+
+    print(f"{'rows':>10} {'build ms':>9} {'scan us':>9} {'tree us':>9} "
+          f"{'scan batch us/q':>16} {'tree batch us/q':>16}")
+    for scale in args.sizes:
+        df = pd.concat([base] * scale, ignore_index=True)
+        if scale > 1:
+            df[FEATURES] += rng.normal(0, 0.01, (len(df), len(FEATURES))) * base[FEATURES].std().to_numpy()
+
+        start = time.perf_counter()
+        index = NeighborIndex(df)
+        build = (time.perf_counter() - start) * 1000
+        points = np.asarray(index.tree.data)
+
+        scan_one = per_call(scan, index, points, [INPUTS], args.k, runs=args.runs) * 1e6
+        tree_one = per_call(index.query_batch, [INPUTS], args.k, runs=args.runs) * 1e6
+        # The brute-force batch is chunked so its distance matrix fits in memory
+        scan_batch = per_call(
+            lambda: [scan(index, points, queries[i:i + 16], args.k) for i in range(0, len(queries), 16)], runs=1
+        ) / len(queries) * 1e6
+        tree_batch = per_call(index.query_batch, queries, args.k, runs=1) / len(queries) * 1e6
+
+        print(f"{len(df):>10} {build:>9.1f} {scan_one:>9.1f} {tree_one:>9.1f} "
+              f"{scan_batch:>16.1f} {tree_batch:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Cold vs. warm process start for utils.dataloader.load_data.
+
+Each measurement runs in a fresh interpreter so the Streamlit in-memory cache
+never helps: "cold" starts from an empty snapshot directory and parses every
+Excel/CSV source, "warm" memory-maps the snapshots written by the cold run.
+
+Run from the repository root:
+    python benchmarks/snapshot_load.py [--runs N]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child():
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from utils.dataloader import load_data
+    start = time.perf_counter()
+    load_data()
+    print(time.perf_counter() - start)
+
+
+def timed_run(snapshot_dir):
+    env = dict(os.environ, SNAPSHOT_DIR=snapshot_dir)
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child()
+
+    cold, warm = [], []
+    for _ in range(args.runs):
+        snapshot_dir = tempfile.mkdtemp(prefix="snapshots-")
+        try:
+            cold.append(timed_run(snapshot_dir))
+            warm.append(timed_run(snapshot_dir))
+        finally:
+            shutil.rmtree(snapshot_dir)
+
+    print(f"cold load_data: {min(cold):.3f}s (best of {args.runs})")
+    print(f"warm load_data: {min(warm):.3f}s (best of {args.runs})")
+    print(f"speedup: {min(cold) / min(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
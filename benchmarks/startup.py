@@ -0,0 +1,81 @@
+"""
+App startup: importing every page module up front vs. lazy page registration.
+
+Each variant runs in a fresh interpreter and reports the wall time of its
+imports and the process's peak resident memory afterwards:
+
+- streamlit: just ``import streamlit``, the floor both variants share
+- eager: the old app.py, importing all six page modules
+- lazy: MultiPage with pages registered by module path, after the default
+  (Home) page has been opened and rendered, which loads and prefetches its data
+
+Each line also lists which heavy libraries (HEAVY) are imported by then.
+Rendering Home outside ``streamlit run`` only logs warnings; data loads count
+towards the lazy variant's time, so run it twice for warm snapshots.
+
+Run from the repository root:
+    python benchmarks/startup.py [--runs N]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ["home", "dataset", "analysis", "case", "linear_regression", "references"]
+
+# Libraries only some pages need, which Home should not import
+HEAVY = ["sklearn", "scipy", "matplotlib", "missingno"]
+
+
+def child(variant):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    start = time.perf_counter()
+    import importlib
+    import streamlit
+    if variant == "eager":
+        for page in PAGES:
+            importlib.import_module("pages." + page)
+    elif variant == "lazy":
+        from utils.multipage import MultiPage
+        app = MultiPage()
+        for page in PAGES:
+            app.add_page(page, "pages." + page)
+        app.load(app.pages[0])()
+    seconds = time.perf_counter() - start
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    heavy = [name for name in HEAVY if name in sys.modules]
+    print(json.dumps({"seconds": seconds, "rss_mb": rss_mb, "modules": len(sys.modules), "heavy": heavy}))
+
+
+def measure(variant):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", variant],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    for variant in ["streamlit", "eager", "lazy"]:
+        runs = [measure(variant) for _ in range(args.runs)]
+        best = min(runs, key=lambda r: r["seconds"])
+        print(f"{variant:>10}: {best['seconds']:.3f}s, {best['rss_mb']:.0f} MB peak RSS, "
+              f"{best['modules']} modules, heavy: {', '.join(best['heavy']) or 'none'} (best of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
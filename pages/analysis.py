@@ -1,8 +1,15 @@
-import numpy as np
 import streamlit as st
 import plotly.express as px
 
-from utils.dataloader import load_data
+from utils import metrics
+from utils.cube import rollup, weighted_rollup
+from utils.dataloader import get_store
+from utils.figure_cache import cached_plotly_chart
+from utils.forecast import TrendForecast, add_forecast
+from utils.frames import compact_frames
+from utils.leaderboard import AVERAGE, RANK
+from utils.memo import memoize
+from utils.mortality import BOTH_SEXES, SUICIDE_RATE
 from utils.constants import *
 
 def world_map(df):
@@ -34,16 +41,18 @@ def world_map(df):
     )
     return fig
 
-@st.cache()
-def filter_df_by_continent(df, df_pivot, region): 
-    return df[df[REGION] == region], df_pivot[df_pivot[REGION] == region]
+@memoize('facts')
+def filter_df_by_continent(store, region): 
+    return store.region_slice(store.facts, region)
 
 def app():
-    df, _, df_country, df_pivot, df_hdi, df_gender, df_mh_adm, df_mh_fac, df_suicide, df_sunshine = load_data()
+    store = get_store()
+    store.prefetch(['facts', 'regions', 'leaderboard', 'cube', 'complete_cube', 'weighted_cube', 'hdi_correlation', 'hdi', 'gender', 'mh_admissions', 'mh_facilities', 'mortality', 'sunshine'])
+    df, leaderboard = store.facts, store.leaderboard
 
     continent = st.sidebar.radio('Continent', ["Whole World"] + REGION_LIST)
     if continent != "Whole World":
-        df, df_pivot = filter_df_by_continent(df, df_pivot, continent)
+        df = filter_df_by_continent(store, continent)
 
     st.markdown('# Analysis')
     if continent == "Whole World":
@@ -53,15 +62,13 @@ def app():
 
     col1, col2 = st.columns([3, 5])
 
-    most19_country = df_pivot.set_index(COUNTRY).select_dtypes(np.number).idxmax()[2019]
-    most19_score = df_pivot[df_pivot[COUNTRY] == most19_country][2019].values[0]
+    most19_country, most19_score = leaderboard.best(continent, 2019)
     most19_text = "<div style='color:grey;'>The Happiest Country in 2019</div>\
         <div style='font-size: 36px; color:green; font-weight:bold;'>%s</div>\
         <div style='font-size: 20px;'>Index: %0.2f</div>" % (most19_country, most19_score)
     col1.markdown(most19_text, unsafe_allow_html=True)
 
-    least19_country = df_pivot.set_index(COUNTRY).select_dtypes(np.number).idxmin()[2019]
-    least19_score = df_pivot[df_pivot[COUNTRY] == least19_country][2019].values[0]
+    least19_country, least19_score = leaderboard.worst(continent, 2019)
     least19_text = "<div style='color:grey;'>The Least Happy Country in 2019</div>\
         <div style='font-size: 36px; color:firebrick; font-weight:bold;'>%s</div>\
         <div style='font-size: 20px;'>Index: %0.2f</div>" % (least19_country, least19_score)
@@ -70,20 +77,36 @@ def app():
     col1.write('\n')
     col2.write('\n')
 
-    most_avg_country = df_pivot.set_index(COUNTRY).mean(axis=1).idxmax()
-    most_avg_score = df_pivot.set_index(COUNTRY).mean(axis=1).max()
+    most_avg_country, most_avg_score = leaderboard.best(continent, AVERAGE)
     most_avg_text = "<div style='color:grey;'>The Happiest Country in 2010-2019</div>\
         <div style='font-size: 36px; color:green; font-weight:bold;'>%s</div>\
         <div style='font-size: 20px;'>Average Index: %0.2f</div>" % (most_avg_country, most_avg_score)
     col1.markdown(most_avg_text, unsafe_allow_html=True)
 
-    least_avg_country = df_pivot.set_index(COUNTRY).mean(axis=1).idxmin()
-    least_avg_score = df_pivot.set_index(COUNTRY).mean(axis=1).min()
+    least_avg_country, least_avg_score = leaderboard.worst(continent, AVERAGE)
     least_avg_text = "<div style='color:grey;'>The Least Happy Country in 2010-2019</div>\
         <div style='font-size: 36px; color:firebrick; font-weight:bold;'>%s</div>\
         <div style='font-size: 20px;'>Average Index: %0.2f</div>" % (least_avg_country, least_avg_score)
     col2.markdown(least_avg_text, unsafe_allow_html=True)
 
+    # Population-weighted average, precomputed per region and year
+    weighted19 = weighted_rollup(store.weighted_cube, 'world' if continent == "Whole World" else 'region', continent)
+    weighted19 = weighted19[weighted19[YEAR] == 2019][HAPPINESS_SCORE].values[0]
+    st.write('\n')
+    st.markdown("<div style='color:grey;'>Population-weighted Average Index in 2019: <b>%0.2f</b></div>" % weighted19,
+        unsafe_allow_html=True)
+
+    with st.expander("Happiness rankings"):
+        periods = {"2010-2019 Average": AVERAGE}
+        periods.update({str(year): year for year in reversed(leaderboard.years)})
+        period = periods[st.selectbox('Period', list(periods))]
+        k = st.slider('Number of countries', 3, 20, 10)
+        col1, col2 = st.columns([3, 3])
+        col1.markdown('**Happiest**')
+        col1.table(leaderboard.top(continent, period, k).set_index(RANK))
+        col2.markdown('**Least Happy**')
+        col2.table(leaderboard.bottom(continent, period, k).set_index(RANK))
+
     st.write('\n')
 
     writeups_map = {
@@ -111,7 +134,9 @@ def app():
     }
     st.markdown(writeups_map[continent])
 
-    st.plotly_chart(world_map(df))
+    # Keyed by the filter and data version, so reruns skip building the animation
+    cached_plotly_chart(('world_map', continent, store.fingerprint('facts')),
+        lambda: compact_frames(world_map(df), 2, f'world_map/{continent}'))
     st.markdown("""
         ---
         ### Happiness Index by Region
@@ -156,7 +181,7 @@ def app():
     # else:
     #     option2 = continent
     
-    df_subregion = df.groupby(by=[YEAR, REGION, 'sub-subregion']).mean().reset_index()
+    df_subregion = rollup(store.cube, 'sub-subregion', continent)
 
     def plot_bar_chart(df) :
         fig = px.bar(df_subregion, x="sub-subregion", y=HAPPINESS_SCORE, color=REGION, 
@@ -172,7 +197,24 @@ def app():
         return fig
 
 
-    st.plotly_chart(plot_bar_chart(df))
+    cached_plotly_chart(('subregion_bar', continent, store.fingerprint('cube')),
+        lambda: compact_frames(plot_bar_chart(df), 3, f'subregion_bar/{continent}'))
+
+    st.write("""
+        The trend of each subregion's average happiness index, continued for a few years past 2019 (dashed) by a linear
+        trend fitted to all subregions at once. Within a continent, the shaded bands are 95% prediction intervals.
+    """)
+
+    def plot_subregion_trend(df_subregion):
+        forecast = TrendForecast(df_subregion, by='sub-subregion')
+        fig = px.line(df_subregion, x=YEAR, y=HAPPINESS_SCORE, color='sub-subregion', range_y=(2,8))
+        for trace in list(fig.data):
+            add_forecast(fig, forecast, trace.name, trace.line.color, band=continent != "Whole World")
+        fig.update_layout(xaxis_title=None)
+        return fig
+
+    cached_plotly_chart(('subregion_trend', continent, store.fingerprint('cube')),
+        lambda: plot_subregion_trend(df_subregion))
 
     # if option2 == 'Asia':
     # # with st.expander("Asia"):
@@ -254,8 +296,10 @@ def app():
     st.markdown(f"""Looking at the pairwise correlations of all metrics with each other for all countries for the decade 2010-2019,
         we find that {writeups_corr_most[continent]} are **on average most heavily correlated with the Happiness Score.**""")
 
-    fig = px.imshow(df.corr().iloc[1:-1,1:-1], color_continuous_scale="RdBu")
-    st.plotly_chart(fig)
+    hdi_correlation = store.hdi_correlation
+    with metrics.span('figure:correlation_heatmap', 'figure'):
+        fig = px.imshow(hdi_correlation.corr_all(continent), color_continuous_scale="RdBu")
+        st.plotly_chart(fig)
 
     st.markdown(f"""
         **However, we hypothesize that these correlations might vary significantly with the standard of living in different 
@@ -354,37 +398,38 @@ def app():
 
     threshold = st.slider('HDI Score Threshold', 0.5, 0.8, 0.8)
 
-    developed_countries = list(df_hdi[df_hdi["hdi2019"] >= threshold][COUNTRY])
-    developing_countries = list(df_hdi[df_hdi["hdi2019"] < threshold][COUNTRY])
-    developed_region_df = df[df[COUNTRY].isin(developed_countries)]
-    developing_region_df = df[df[COUNTRY].isin(developing_countries)]
+    # Both groups come from prefix sums over countries ranked by HDI, see utils/correlation.py
+    developed_countries, developing_countries = hdi_correlation.countries(continent, threshold)
+    developed_corr, developing_corr = hdi_correlation.corr(continent, threshold)
     
     col1, col2 = st.columns([1, 1])
     with col1: 
-        if not developed_region_df.empty:
+        if developed_countries:
             with st.expander("List of Developed Countries"):
-                st.write(", ".join(developed_region_df[COUNTRY].unique().tolist()))
+                st.write(", ".join(developed_countries))
         else: 
             st.markdown(f"""No developed countries found for HDI threshold {threshold} in {continent}.""")
     
     with col2: 
-        if not developing_region_df.empty:
+        if developing_countries:
             with st.expander("List of Developing Countries"):
-                st.write(", ".join(developing_region_df[COUNTRY].unique().tolist()))
+                st.write(", ".join(developing_countries))
         else: 
             st.markdown(f"""No developing countries found for HDI threshold {threshold} in {continent}.""")  
     
-    if not developed_region_df.empty:
+    if developed_corr is not None:
         st.markdown("""**Developed Countries**""")
         st.markdown(writeups_developed[continent])
-        fig = px.imshow(developed_region_df.corr().iloc[1:-1,1:-1], color_continuous_scale="RdBu", width=680)
-        st.plotly_chart(fig)
+        with metrics.span('figure:developed_heatmap', 'figure'):
+            fig = px.imshow(developed_corr, color_continuous_scale="RdBu", width=680)
+            st.plotly_chart(fig)
   
-    if not developing_region_df.empty:
+    if developing_corr is not None:
         st.markdown("""**Developing Countries**""")
         st.markdown(writeups_developing[continent])
-        fig = px.imshow(developing_region_df.corr().iloc[1:-1,1:-1], color_continuous_scale="RdBu", width=680)
-        st.plotly_chart(fig)
+        with metrics.span('figure:developing_heatmap', 'figure'):
+            fig = px.imshow(developing_corr, color_continuous_scale="RdBu", width=680)
+            st.plotly_chart(fig)
         
     st.markdown("---")
     st.markdown('### Quality of Life Factors')
@@ -440,11 +485,11 @@ def app():
     }    
 
     st.write(writeups_vs_year_1[option])
-    df1 = df.dropna()
-    df1 = df1.groupby([REGION, YEAR])[[option]].mean().reset_index()
-    fig = px.line(df1, x=YEAR, y=option, color=REGION,
-            category_orders={REGION: REGION_LIST})
-    st.plotly_chart(fig)
+    df1 = rollup(store.complete_cube, 'region', continent)[[REGION, YEAR, option]]
+    with metrics.span('figure:quality_of_life_trend', 'figure'):
+        fig = px.line(df1, x=YEAR, y=option, color=REGION,
+                category_orders={REGION: REGION_LIST})
+        st.plotly_chart(fig)
     st.write(writeups_vs_year_2[option])
 
     # if option == LOG_GDP: 
@@ -452,10 +497,14 @@ def app():
     #             color=REGION, hover_name=COUNTRY,
     #             category_orders={REGION: REGION_LIST})
     # else: 
-    fig = px.scatter(df.dropna(), x=option, y=HAPPINESS_SCORE, animation_frame=YEAR, 
+    # Animation frames follow row order, and the fact table is sorted by country first
+    def plot_quality_of_life(df, option):
+        return px.scatter(df.dropna().sort_values(YEAR, kind='stable'), x=option, y=HAPPINESS_SCORE, animation_frame=YEAR, 
             color=REGION, hover_name=COUNTRY,
             category_orders={REGION: REGION_LIST})
-    st.plotly_chart(fig)
+
+    cached_plotly_chart(('quality_of_life', continent, option, store.fingerprint('facts')),
+        lambda: compact_frames(plot_quality_of_life(df, option), 3, f'quality_of_life/{continent}/{option}'))
     
 
     st.markdown("---")
@@ -477,24 +526,21 @@ def app():
     """)
 
     def plot_gender(happiness_df, gender):
-        gender_19 = gender.rename(columns={2019.0:'2019'})[[COUNTRY, '2019']]
+        gender_19 = gender.rename(columns={2019.0:'GDI'})[[COUNTRY, 'GDI']]
         gender_19[COUNTRY] = gender_19[COUNTRY].str.strip()
 
-        happiness_df_with_continent = happiness_df.join(df_country.set_index(COUNTRY), on=COUNTRY)
-
-        merged = happiness_df_with_continent.merge(gender_19, on=COUNTRY, how='inner')
-        merged = merged.rename(columns={'2019_x':HAPPINESS_SCORE,'2019_y':'GDI'})
+        merged = happiness_df.merge(gender_19, on=COUNTRY, how='inner')
         
         fig = px.scatter(merged.dropna(), x="GDI", y=HAPPINESS_SCORE, hover_name=COUNTRY, color=REGION,
                 category_orders={REGION: REGION_LIST})
 
         return fig
     
-    df_pivot19 = df_pivot.rename(columns={2019:'2019'})[[COUNTRY, '2019']]
-    df_pivot19 = df_pivot19.rename(columns={COUNTRY:COUNTRY})
-    df_pivot19[COUNTRY] = df_pivot19[COUNTRY].str.strip()
+    # 2019 happiness with each country's region, straight from the fact table
+    df19 = df.xs(2019, level='year')[[COUNTRY, HAPPINESS_SCORE, 'sub-subregion', 'subregion', REGION, 'unsd_m49_codes']]
 
-    st.plotly_chart(plot_gender(df_pivot19, df_gender))
+    with metrics.span('figure:gender', 'figure'):
+        st.plotly_chart(plot_gender(df19, store.gender))
 
 
     st.write("""
@@ -523,17 +569,15 @@ def app():
                                                     'FactValueNumeric':'MentalHealthAdmissionsPer100000'})
         mental_health[COUNTRY] = mental_health[COUNTRY].str.strip()
 
-        happiness_df_with_continent = happiness_df.join(df_country.set_index(COUNTRY), on=COUNTRY)
-
-        happiness_mental_health_merged = happiness_df_with_continent.merge(mental_health, on=COUNTRY, how='inner')
-        happiness_mental_health_merged = happiness_mental_health_merged.rename(columns={'2019': HAPPINESS_SCORE})
+        happiness_mental_health_merged = happiness_df.merge(mental_health, on=COUNTRY, how='inner')
 
         fig = px.scatter(happiness_mental_health_merged.dropna(), x="MentalHealthAdmissionsPer100000", y=HAPPINESS_SCORE, 
                 hover_name=COUNTRY, color="region", labels={"MentalHealthAdmissionsPer100000": "Mental Health Admissions (per 100,000)"}, 
                 category_orders={"region": ["Africa", "Europe", "Asia", "Oceania", "Americas"]})
         return fig
     
-    st.plotly_chart(plot_mental_health(df_pivot19, df_mh_adm))
+    with metrics.span('figure:mental_health', 'figure'):
+        st.plotly_chart(plot_mental_health(df19, store.mh_admissions))
 
     st.write("""
         For countries having close to 0 mental health admissions per 100,000 people, the happiness score seems to be \
@@ -549,16 +593,14 @@ def app():
                             'FactValueNumeric':'MentalHealthFacilitiesPer100000'})
         x[COUNTRY] = x[COUNTRY].str.strip()
 
-        happiness_df_with_continent = happiness_df.join(df_country.set_index(COUNTRY), on=COUNTRY)
-
-        happiness_mental_health_facilities_merged = happiness_df_with_continent.merge(x, on=COUNTRY, how='inner')
-        happiness_mental_health_facilities_merged = happiness_mental_health_facilities_merged.rename(columns={'2019':HAPPINESS_SCORE})
+        happiness_mental_health_facilities_merged = happiness_df.merge(x, on=COUNTRY, how='inner')
         fig = px.scatter(happiness_mental_health_facilities_merged.dropna(), x="MentalHealthFacilitiesPer100000", y=HAPPINESS_SCORE, 
                 hover_name=COUNTRY, labels={"MentalHealthFacilitiesPer100000": "Mental Health Facilities (per 100,000)"}, 
                 range_x=(0,1), color="region", category_orders={"region": ["Africa", "Europe", "Asia", "Oceania", "Americas"]})
         return fig
 
-    st.plotly_chart(plot_mental_health_facilities(df_pivot19, df_mh_fac))
+    with metrics.span('figure:mental_health_facilities', 'figure'):
+        st.plotly_chart(plot_mental_health_facilities(df19, store.mh_facilities))
 
     st.markdown("""
         --- 
@@ -577,26 +619,21 @@ def app():
         """)
 
     def plot_suicide(df, suicide):
-        suicide = suicide[suicide['Dim1'] == 'Both sexes']
-        suicide = suicide[['Location','FactValueNumeric', 'ParentLocation', 'Period']]
-        suicide = suicide.rename(columns={'Location':COUNTRY, 
-                                        'FactValueNumeric':'SuicideRatePer100000'})
-        suicide[COUNTRY] = suicide[COUNTRY].str.strip()
-
-        happiness_suicide_merged = df.merge(suicide, left_on=[COUNTRY, YEAR], right_on=[COUNTRY, 'Period'], how='inner')
-        happiness_suicide_merged = happiness_suicide_merged[[COUNTRY, YEAR, HAPPINESS_SCORE, 'SuicideRatePer100000']].dropna()
-        happiness_suicide_merged = happiness_suicide_merged.astype({HAPPINESS_SCORE: 'float64', 'SuicideRatePer100000': 'float64'})
+        # Keyed join onto the both-sexes partitions of the panel's years
+        suicide = suicide.select(BOTH_SEXES, df[YEAR].unique())
+        happiness_suicide_merged = df[[COUNTRY, YEAR, HAPPINESS_SCORE]].join(suicide[SUICIDE_RATE], on=[COUNTRY, YEAR], how='inner')
+        happiness_suicide_merged = happiness_suicide_merged.dropna().astype({HAPPINESS_SCORE: 'float64'})
 
         df_hs = happiness_suicide_merged.sort_values(by=[YEAR,HAPPINESS_SCORE], ascending=[True, False])
         
-        fig = px.line(data_frame=df_hs, x=COUNTRY, y=[HAPPINESS_SCORE, "SuicideRatePer100000"], 
+        fig = px.line(data_frame=df_hs, x=COUNTRY, y=[HAPPINESS_SCORE, SUICIDE_RATE], 
                     hover_name=COUNTRY, animation_frame=YEAR)
         
         for t in fig.data:
-            if t.name=="SuicideRatePer100000": t.update(yaxis="y2")
+            if t.name==SUICIDE_RATE: t.update(yaxis="y2")
         for f in fig.frames:
             for t in f.data:
-                if t.name=="SuicideRatePer100000": t.update(yaxis="y2")
+                if t.name==SUICIDE_RATE: t.update(yaxis="y2")
         
         fig.update_layout(
             yaxis2={"overlaying":"y", "side":"right", "title": "Suicide Rates Per 100,000", "range":(0,50)},
@@ -621,7 +658,8 @@ def app():
         return fig
 
 
-    st.plotly_chart(plot_suicide(df, df_suicide))
+    cached_plotly_chart(('suicide', continent, store.fingerprint('facts'), store.fingerprint('mortality')),
+        lambda: compact_frames(plot_suicide(df, store.mortality), 3, f'suicide/{continent}'))
 
     st.markdown("""
         --- 
@@ -635,11 +673,8 @@ def app():
         sunshine = sunshine[[COUNTRY,YEAR]]
         sunshine = sunshine.rename(columns={YEAR:'YearlySunshineHours'})
         sunshine[COUNTRY] = sunshine[COUNTRY].str.strip()
-        
-        happiness_df_with_continent = happiness_df.join(df_country.set_index(COUNTRY), on=COUNTRY)
 
-        happiness_sunshine_merged = happiness_df_with_continent.merge(sunshine, on=COUNTRY, how='inner')
-        happiness_sunshine_merged = happiness_sunshine_merged.rename(columns={'2019':HAPPINESS_SCORE})
+        happiness_sunshine_merged = happiness_df.merge(sunshine, on=COUNTRY, how='inner')
 
         fig = px.scatter(happiness_sunshine_merged.dropna(), x="YearlySunshineHours", y=HAPPINESS_SCORE, hover_name=COUNTRY, color="region",
                 category_orders={REGION: REGION_LIST})
@@ -660,7 +695,8 @@ def app():
 
         return fig
 
-    st.plotly_chart(plot_sunshine(df_pivot19, df_sunshine))
+    with metrics.span('figure:sunshine', 'figure'):
+        st.plotly_chart(plot_sunshine(df19, store.sunshine))
 
     st.markdown(f"""
         **Well, not everything has a correlation!**
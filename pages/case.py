@@ -1,15 +1,18 @@
 import streamlit as st
 import plotly.express as px
 
-from utils.dataloader import load_mvp_data
+from utils.dataloader import get_store
+from utils.forecast import add_forecast
 from utils.constants import *
 
 def app():
-    df, _ = load_mvp_data()
+    store = get_store()
+    df, forecast = store.happiness, store.forecast
     
     st.title('Case Studies')
     st.write("Apart from the attributes we explored in the dataset and factors discussed in further analysis, we believe that other, \
         less measurable factors can also play a significant role in the happiness scores of a country.")
+    st.caption("Dashed lines continue each country's linear trend past the last survey year; shaded bands are 95% prediction intervals.")
 
     with st.expander("Yemen"):
         st.write("Going back to the happiness score by \
@@ -24,6 +27,7 @@ def app():
             fig = px.line(yem_df, x=YEAR, y=HAPPINESS_SCORE)
             score = lambda year: yem_df[yem_df[YEAR]==year][HAPPINESS_SCORE].values[0]
             fig.add_annotation(x=2014, y=score(2014), text="Onset of Yemeni Civil War", showarrow=True, arrowhead=1)
+            add_forecast(fig, forecast, 'Yemen', fig.data[0].line.color)
             st.plotly_chart(fig)
 
         col1, _spacing, col2, _ = st.columns([5, 1, 4, 1])
@@ -47,6 +51,7 @@ def app():
         fig.add_annotation(x=2012, y=score(2012), text="Venezuela's crisis onset", showarrow=True, arrowhead=1)
         fig.add_annotation(x=2013, y=score(2013), text="Basic food needs impacted", showarrow=True, arrowhead=1)
         fig.add_annotation(x=2015, y=score(2015), text="Sharp increase in homicide rates", showarrow=True, arrowhead=1)
+        add_forecast(fig, forecast, 'Venezuela', fig.data[0].line.color)
         st.plotly_chart(fig)
 
         col1, _spacing, col2 = st.columns([5,1,4])
@@ -73,6 +78,7 @@ def app():
         fig.add_annotation(x=2014, y=score(2014), text="Prime Ministerial Elections", showarrow=True, arrowhead=1)
         fig.add_annotation(x=2016, y=score(2016), text="Demonetization", showarrow=True, arrowhead=1)
         fig.add_annotation(x=2019, y=score(2019), text="Prime Ministerial Elections", showarrow=True, arrowhead=1)
+        add_forecast(fig, forecast, 'India', fig.data[0].line.color)
         st.plotly_chart(fig)
         
         st.markdown("""
@@ -91,5 +97,7 @@ def app():
         """)
         
         fig2 = px.line(x, x=YEAR, y=HAPPINESS_SCORE, color=COUNTRY)
+        for trace in list(fig2.data):
+            add_forecast(fig2, forecast, trace.name, trace.line.color, band=False)
         st.plotly_chart(fig2)
     
\ No newline at end of file
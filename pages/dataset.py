@@ -1,12 +1,30 @@
 import streamlit as st
 import plotly.express as px
-import missingno
 
-from utils.dataloader import load_mvp_data
+from utils import metrics
+from utils.dataloader import get_store
+from utils.memo import memoize
+from utils.nullity import render_matrix
 from utils.constants import *
 
+@memoize('nullity')
+def nullity_matrix(store, metric=None):
+    # Drawn once per data version from the nullity bits, then served as PNG bytes
+    index = store.nullity
+    frame = index.table_nullity() if metric is None else index.pivot_nullity(metric)
+    if not frame.isnull().any(axis=None):
+        return None
+    with metrics.span('figure:nullity_matrix', 'figure'):
+        return render_matrix(frame)
+
+def preview_nulls(png):
+    # generate preview of entries with null values
+    if png is not None:
+        st.image(png, use_column_width=True)
+
 def app():
-    df_filtered, df_unfiltered = load_mvp_data()
+    store = get_store()
+    df_filtered, nullity = store.happiness, store.nullity
 
     st.markdown('# Dataset')
     st.markdown('## Data Sources')
@@ -82,13 +100,7 @@ def app():
         We first look at our whole table to check if there is any jarring nullity that warrants dropping some columns.
     """)
 
-    def preview_nulls(df):
-        # generate preview of entries with null values
-        if df.isnull().any(axis=None):
-            fig = missingno.matrix(df).figure
-            return fig
-
-    st.pyplot(preview_nulls(df_unfiltered))
+    preview_nulls(nullity_matrix(store))
 
     st.write("""
         While the overall data seems reliably populated from the above chart, we note that surveys might not be 
@@ -100,9 +112,8 @@ def app():
         to have countries as rows, years as columns, and values as the happiness index.
     """)
 
-    happiness_df = df_unfiltered.pivot_table(index=COUNTRY, columns=YEAR, values=HAPPINESS_SCORE).reset_index()
-    happiness_df_years_filtered = df_filtered.pivot_table(index=COUNTRY, columns=YEAR, values=HAPPINESS_SCORE).reset_index()
-    st.pyplot(preview_nulls(happiness_df))
+    filtered_years = df_filtered[YEAR].unique()
+    preview_nulls(nullity_matrix(store, HAPPINESS_SCORE))
 
     st.write("""
         We find that the happiness report survey data is **extremely sparse for 2005 - 2009, and 2020**. Therefore, we make a 
@@ -121,14 +132,14 @@ def app():
 
     col1, col2 = st.columns([3, 3])
     with col1:
-        st.metric("Total Countries (2005-2020)", len(happiness_df))
+        st.metric("Total Countries (2005-2020)", len(nullity.observed(HAPPINESS_SCORE)))
     with col2: 
-        st.metric("Total Countries (2010-2019)", len(happiness_df_years_filtered))
+        st.metric("Total Countries (2010-2019)", len(nullity.observed(HAPPINESS_SCORE, filtered_years)))
     col1, col2 = st.columns([3, 3])
     with col1:
-        st.metric("Good* Countries (2005-2020)", len(happiness_df.dropna()))
+        st.metric("Good* Countries (2005-2020)", len(nullity.complete(HAPPINESS_SCORE)))
     with col2: 
-        st.metric("Good* Countries (2010-2019)", len(happiness_df_years_filtered.dropna()))
+        st.metric("Good* Countries (2010-2019)", len(nullity.complete(HAPPINESS_SCORE, filtered_years)))
 
     st.write("*Good countries refer to the subset of countries that have data for ALL the years mentioned, i.e., no nulls.")
     st.markdown("""
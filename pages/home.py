@@ -3,12 +3,13 @@ import numpy as np
 import pandas as pd
 import plotly.express as px
 
-from utils.dataloader import load_data, load_mvp_data
+from utils.dataloader import PREFETCH_DATASETS, get_store
 from utils.constants import *
 
 def app():
     # Load a small bare minimum dataset on app load for faster load times
-    df, _ = load_mvp_data()
+    store = get_store()
+    store.get('happiness')
 
     st.markdown("# Happiness, Around the World")
     st.write("""Happiness is one of the key factors that relates to success, satisfaction, 
@@ -61,5 +62,6 @@ def app():
 
     
 
-     # Load all data used on other pages and cache it for improved performance on navigating to these other pages
-    load_data()
+     # Load the data used on other pages and cache it for improved performance on navigating to these other pages;
+     # the sklearn and scipy backed datasets are left to the pages that use them
+    store.prefetch(PREFETCH_DATASETS)
@@ -1,51 +1,19 @@
 import streamlit as st
-import numpy as np
-import pandas as pd
 import plotly.express as px
 
-from utils.dataloader import load_data, load_mvp_data, load_country_data
-from utils.constants import *
+from utils.dataloader import get_store
+from utils.pca import cached_projection
 
 def app():
 
-    # Read File 
-    raw,_ = load_mvp_data()
-    df_raw = raw[['Country','Log GDP per capita','Social support','Healthy life expectancy at birth','Freedom to make life choices', 'Generosity',
-           'Perceptions of corruption','Happiness Score']]
-    df_raw = df_raw.dropna()
-    df_country = load_country_data()
-    df_country = df_country[['Country', 'region']]
-
-    merged = df_raw.merge(df_country, on='Country', how='left')
-    df_y = df_raw[['Log GDP per capita','Social support','Healthy life expectancy at birth','Freedom to make life choices', 'Generosity',
-           'Perceptions of corruption','Happiness Score']].dropna()
-    df = df_raw[['Log GDP per capita','Social support','Healthy life expectancy at birth','Freedom to make life choices', 'Generosity',
-           'Perceptions of corruption']]
-    df_centered = (df - np.min(df, axis = 0)) / (np.max(df, axis = 0) - np.min(df, axis = 0))
-    m = np.cov(df_centered, rowvar = False)
-    eigenvalues, eigenvectors = np.linalg.eigh(m) 
-    # sort the eigenvalues from highest to lowest
-    sorted_idx = np.argsort(eigenvalues)[::-1]
-    # sort the eigenvectors according to the new order of the eigenvalues
-    eigenvectors_sorted = eigenvectors[:, sorted_idx]
-    # sort the eigenvalues
-    eigenvalues_sorted = eigenvalues[sorted_idx]
-
-    v = eigenvalues_sorted / np.sum(eigenvalues_sorted)
-    v_cumulative = np.cumsum(v)
-    print(v_cumulative)
-
-
-    pc = eigenvectors_sorted[:, :3]
-    # now, let's transform the data
-    data_transform = np.dot(df_centered, pc)
-
-    data = pd.DataFrame(data_transform)
-    data['Continent'] = merged['region']
+    # Fitted once per data version, reruns only redraw
+    projection = cached_projection(get_store(), mode='exact', n_components=3)
+    data = projection.data
+    v_cumulative = projection.result.cumulative_ratio
 
     fig = px.scatter(x = data[0], y = data[1], color = data['Continent'])
     st.plotly_chart(fig)
-    
+
     ## 3d plot
     fig = px.scatter_3d(
         data, x=0, y=1, z=2, color=data['Continent'],
@@ -54,4 +22,3 @@ def app():
     )
 
     st.plotly_chart(fig)
-    
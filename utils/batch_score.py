@@ -0,0 +1,79 @@
+"""
+Headless batch scoring with the Prediction page's regression model.
+
+Reads a CSV of indicator vectors in chunks, scores each chunk with one
+vectorized predict and appends it to the output CSV, so inputs larger than
+memory work. The input needs the six feature columns in model units (see
+FEATURES); a raw "GDP per capita" column is log-transformed when "Log GDP per
+capita" is absent, by the same utils.regression.feature_matrix the page applies
+to its sliders.
+
+Usage, from the repository root:
+    python -m utils.batch_score scenarios.csv scored.csv [--chunksize N] [--nearest]
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import pandas as pd
+
+from utils.constants import *
+from utils.regression import feature_matrix
+
+logger = logging.getLogger(__name__)
+
+PREDICTED = "Predicted " + HAPPINESS_SCORE
+NEAREST_COUNTRY = "Closest country"
+NEAREST_SCORE = "Closest country's " + HAPPINESS_SCORE
+
+
+def score_csv(model, src, dst, chunksize=100000, nearest=False):
+    """Score every row of `src` and write it with the prediction to `dst`.
+
+    Args:
+        model (HappinessModel): Fitted model, e.g. from cached_model.
+        src: Input CSV path or buffer.
+        dst: Output CSV path or buffer; rows are written chunk by chunk.
+        chunksize (int): Rows read, scored and written at a time.
+        nearest (bool): Also add the observed country with the closest score.
+
+    Returns:
+        tuple: (rows scored, seconds taken)
+    """
+    start = time.perf_counter()
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(src, chunksize=chunksize)):
+        chunk[PREDICTED] = model.predict_batch(feature_matrix(chunk))
+        if nearest:
+            chunk[NEAREST_COUNTRY], chunk[NEAREST_SCORE] = model.nearest_batch(chunk[PREDICTED])
+        chunk.to_csv(dst, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+
+        rows += len(chunk)
+        elapsed = time.perf_counter() - start
+        logger.info("scored %d rows (%.0f rows/s)", rows, rows / elapsed if elapsed else float('inf'))
+    return rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV of indicator vectors with the happiness model.")
+    parser.add_argument("src", help="input CSV ('-' for stdin)")
+    parser.add_argument("dst", help="output CSV")
+    parser.add_argument("--chunksize", type=int, default=100000)
+    parser.add_argument("--nearest", action="store_true", help="add the country with the closest observed score")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Imported here so `--help` does not pull in streamlit
+    from utils.dataloader import get_store
+    from utils.regression import cached_model
+
+    model = cached_model(get_store())
+    src = sys.stdin if args.src == '-' else args.src
+    rows, seconds = score_csv(model, src, args.dst, args.chunksize, args.nearest)
+    print(f"scored {rows} rows in {seconds:.2f}s ({rows / seconds if seconds else 0:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compact in-memory dtypes for the datasets held by the DataStore.
+
+Every app process keeps its own copy of each dataset, so per-replica memory
+is dominated by object string columns (one Python str per cell) and float64
+metrics. compact() stores string columns such as country, region and WHO
+location names as categoricals, and float64 columns as float32, which keeps
+about seven significant digits, well beyond the precision of the survey
+metrics. Code doing arithmetic on the metrics converts them back to float64
+(``to_numpy(dtype=float)``) where accumulated error would matter. Columns
+compared against user-chosen thresholds are kept as they are: float32(0.51)
+is below 0.51, so a country at exactly the threshold would change sides.
+"""
+
+import pandas as pd
+
+
+def _repeated_strings(values):
+    values = values.dropna()
+    return values.nunique() <= len(values) // 2 and values.map(type).eq(str).all()
+
+
+def compact(df, keep=()):
+    """Return `df` with string columns as categoricals and float64 columns as float32.
+
+    Only string columns whose values repeat are converted; a column of
+    unique names is smaller as plain objects than as a categorical. Object
+    columns holding anything besides strings (e.g. numbers mixed with
+    placeholders) are left as they are.
+
+    Args:
+        df (pd.DataFrame): Any frame; it is not modified.
+        keep: Columns left as they are, e.g. ones compared against thresholds.
+
+    Returns:
+        pd.DataFrame: A compacted copy.
+    """
+    types = {}
+    for col in df.columns:
+        if col in keep:
+            continue
+        values = df[col]
+        if values.dtype == 'float64':
+            types[col] = 'float32'
+        elif values.dtype == object and _repeated_strings(values):
+            types[col] = 'category'
+    return df.astype(types) if types else df
+
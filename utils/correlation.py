@@ -0,0 +1,125 @@
+"""
+Incremental correlation engine for the HDI threshold split.
+
+Panel rows are sorted once by their country's HDI. For each pair of metrics we
+keep prefix sums of the sufficient statistics of a Pearson correlation (n, Σx,
+Σx², Σxy), counted only over rows where both metrics are present, exactly like
+DataFrame.corr's pairwise-complete behaviour. The correlation matrix of the
+countries below or above any threshold is then the difference of two prefix
+rows instead of a fresh pass over the data.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import *
+
+WORLD = "Whole World"
+
+# The metrics shown in the correlation heatmaps
+CORR_METRICS = [
+    HAPPINESS_SCORE, LOG_GDP, SOCIAL_SUPPORT, LIFE_EXPECTANCY, FREEDOM,
+    GENEROSITY, CORRUPTION, POSITIVE_AFFECT, NEGATIVE_AFFECT,
+]
+
+
+class _PrefixStats:
+    """Prefix sums for the rows of one scope, ordered by ascending HDI."""
+
+    def __init__(self, frame, hdi, metrics):
+        key = frame[COUNTRY].map(hdi).to_numpy(dtype=float)
+        order = np.argsort(key, kind='stable')  # countries without HDI sort last
+        self.key = key[order]
+        self.countries = frame[COUNTRY].to_numpy()[order]
+        self.ranked = int(np.count_nonzero(~np.isnan(self.key)))
+
+        values = frame[metrics].to_numpy(dtype=float)[order]
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0.0)
+        # Centering does not change r but keeps the one-pass sums well conditioned
+        values -= values.sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+        values[~present] = 0.0
+
+        both = present[:, :, None] & present[:, None, :]
+        x = values[:, :, None] * both
+        self.n = self._prefix(both.astype(float))
+        self.sx = self._prefix(x)
+        self.sxx = self._prefix(x * values[:, :, None])
+        self.sxy = self._prefix(values[:, :, None] * values[:, None, :])
+
+    @staticmethod
+    def _prefix(a):
+        out = np.zeros((a.shape[0] + 1,) + a.shape[1:])
+        np.cumsum(a, axis=0, out=out[1:])
+        return out
+
+    @property
+    def nbytes(self):
+        return self.n.nbytes + self.sx.nbytes + self.sxx.nbytes + self.sxy.nbytes
+
+    def split(self, threshold):
+        """Row position separating HDI < threshold from HDI >= threshold."""
+        return int(np.searchsorted(self.key[:self.ranked], threshold, side='left'))
+
+    def corr(self, start, stop):
+        n = self.n[stop] - self.n[start]
+        sx = self.sx[stop] - self.sx[start]
+        sxx = self.sxx[stop] - self.sxx[start]
+        sxy = self.sxy[stop] - self.sxy[start]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = n * sxy - sx * sx.T
+            var = (n * sxx - sx ** 2) * (n * sxx.T - sx.T ** 2)
+            r = cov / np.sqrt(var)
+        r[(n < 2) | ~(var > 0)] = np.nan
+        return np.clip(r, -1.0, 1.0)
+
+
+class ThresholdCorrelation:
+    """Developed/developing correlation matrices for any HDI threshold and continent.
+
+    Args:
+        facts (pd.DataFrame): The happiness fact table.
+        hdi (pd.DataFrame): HDI per country.
+        metrics (list): Metric columns to correlate.
+        key (str): Column of `hdi` used to rank countries.
+    """
+
+    def __init__(self, facts, hdi, metrics=CORR_METRICS, key='hdi2019'):
+        self.metrics = list(metrics)
+        hdi = hdi.drop_duplicates(COUNTRY).set_index(COUNTRY)[key]
+        self.scopes = {WORLD: _PrefixStats(facts, hdi, self.metrics)}
+        for region in REGION_LIST:
+            self.scopes[region] = _PrefixStats(facts[facts[REGION] == region], hdi, self.metrics)
+
+    def __len__(self):
+        return len(self.scopes[WORLD].key)
+
+    @property
+    def nbytes(self):
+        return sum(stats.nbytes for stats in self.scopes.values())
+
+    def _frame(self, r):
+        return pd.DataFrame(r, index=self.metrics, columns=self.metrics)
+
+    def corr_all(self, scope=WORLD):
+        """Correlation over every row of the scope, HDI or not."""
+        stats = self.scopes[scope]
+        return self._frame(stats.corr(0, len(stats.key)))
+
+    def countries(self, scope, threshold):
+        """Return sorted (developed, developing) country names for a threshold."""
+        stats = self.scopes[scope]
+        k = stats.split(threshold)
+        return (
+            sorted(set(stats.countries[k:stats.ranked])),
+            sorted(set(stats.countries[:k])),
+        )
+
+    def corr(self, scope, threshold):
+        """Return (developed, developing) correlation frames; None for an empty group."""
+        stats = self.scopes[scope]
+        k = stats.split(threshold)
+        developed = self._frame(stats.corr(k, stats.ranked)) if k < stats.ranked else None
+        developing = self._frame(stats.corr(0, k)) if k > 0 else None
+        return developed, developing
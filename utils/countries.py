@@ -0,0 +1,66 @@
+"""
+Country name canonicalization.
+
+Every dataset spells some countries differently from the World Happiness
+Report. The aliases live in data/country_aliases.csv as (source, raw,
+canonical) rows, so supporting a new indicator file only needs new rows there.
+"""
+
+import functools
+import logging
+
+import pandas as pd
+
+ALIASES_PATH = 'data/country_aliases.csv'
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def alias_index(path=ALIASES_PATH):
+    """Compile the alias table into {source: {raw name: canonical name}}."""
+    aliases = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return {
+        source: dict(zip(group['raw'], group['canonical']))
+        for source, group in aliases.groupby('source')
+    }
+
+
+def canonicalize(names, source):
+    """Map the raw country names of one dataset to their canonical spelling.
+
+    Args:
+        names (pd.Series): Raw country names.
+        source (str): Dataset key in the alias table, e.g. 'gdi'.
+
+    Returns:
+        pd.Series: The names with every known alias replaced.
+    """
+    mapping = alias_index().get(source)
+    if not mapping:
+        return names
+    return names.map(mapping).fillna(names)
+
+
+def unmatched_names(names, reference):
+    """Return the sorted names in `reference` that have no match in `names`."""
+    return sorted(set(reference.dropna()) - set(names.dropna()))
+
+
+def report_unmatched(reference, datasets):
+    """Log, per dataset, which reference countries it has no row for.
+
+    Args:
+        reference (pd.Series): Canonical country names, i.e. the happiness panel.
+        datasets (dict): Dataset key -> Series of canonicalized country names.
+
+    Returns:
+        dict: Dataset key -> list of unmatched reference names.
+    """
+    report = {}
+    for source, names in datasets.items():
+        report[source] = unmatched_names(names, reference)
+        if report[source]:
+            logger.info("%s has no match for %d countries: %s",
+                source, len(report[source]), ", ".join(report[source]))
+    return report
@@ -0,0 +1,138 @@
+"""
+Precomputed aggregate cube over the happiness fact table.
+
+For every year and every metric the cube holds count, sum, mean, min, max and
+std at three hierarchy levels: the whole world, each region and each
+sub-subregion. Rows are indexed by (level, scope, year, region, sub-subregion),
+where scope is either "Whole World" or one region, so the rollup behind any
+continent filter is a single index lookup. A second cube with the same index
+holds population-weighted means.
+"""
+
+import pandas as pd
+
+from utils.constants import *
+
+WORLD = "Whole World"
+ALL = "All"
+CUBE_STATS = ['count', 'sum', 'mean', 'min', 'max', 'std']
+
+# Hierarchy level -> grouping columns below the year
+LEVELS = {
+    'world': [],
+    'region': [REGION],
+    'sub-subregion': [REGION, 'sub-subregion'],
+}
+
+INDEX = ['level', 'scope', YEAR, REGION, 'sub-subregion']
+
+
+def metric_columns(facts):
+    return facts.select_dtypes('number').columns.drop(YEAR).tolist()
+
+
+def _scoped(stats, level, keys):
+    # Index one level's (year, *keys) groups by INDEX, once per scope that can see them
+    keys_frame = stats.index.to_frame(index=False)
+    for col in (REGION, 'sub-subregion'):
+        keys_frame[col] = keys_frame[col].astype(str) if col in keys else ALL
+    keys_frame['level'] = level
+
+    # Every row is visible from the world scope, and from its own region's scope
+    scopes = [WORLD] if REGION not in keys else [WORLD, keys_frame[REGION]]
+    for scope in scopes:
+        index = pd.MultiIndex.from_frame(keys_frame.assign(scope=scope)[INDEX])
+        yield stats.set_axis(index, axis=0)
+
+
+def build_cube(facts):
+    metrics = metric_columns(facts)
+    parts = []
+    for level, keys in LEVELS.items():
+        stats = facts.groupby([YEAR] + keys, observed=True)[metrics].agg(CUBE_STATS)
+        parts.extend(_scoped(stats, level, keys))
+
+    return pd.concat(parts).sort_index()
+
+
+def build_complete_cube(facts):
+    # Same cube restricted to rows with no missing value in any column
+    return build_cube(facts.dropna())
+
+
+def build_weighted_cube(facts, population):
+    """Population-weighted mean of every metric, indexed like the cube.
+
+    Each country-year counts with its population in that year. A metric's
+    mean only weighs the rows where it has a value, and rows without a
+    population figure carry no weight. The Population column holds the total
+    population of the rows in each group.
+
+    Args:
+        facts (pd.DataFrame): The happiness fact table.
+        population (pd.DataFrame): Long (country, year, population) table.
+
+    Returns:
+        pd.DataFrame: Rows indexed by INDEX, one column per metric plus Population.
+    """
+    metrics = metric_columns(facts)
+    weights = facts[[COUNTRY, YEAR]].merge(population, on=[COUNTRY, YEAR], how='left')
+    weights = pd.Series(weights[POPULATION].fillna(0).to_numpy(float), index=facts.index)
+
+    values = facts[metrics]
+    frame = pd.concat([
+        values.mul(weights, axis=0),
+        values.notna().mul(weights, axis=0).add_suffix(' weight'),
+        weights.rename(POPULATION),
+        facts[[YEAR, REGION, 'sub-subregion']],
+    ], axis=1)
+
+    columns = metrics + [m + ' weight' for m in metrics] + [POPULATION]
+    parts = []
+    for level, keys in LEVELS.items():
+        sums = frame.groupby([YEAR] + keys, observed=True)[columns].sum()
+        mass = sums[[m + ' weight' for m in metrics]].set_axis(metrics, axis=1)
+        means = sums[metrics].div(mass.where(mass > 0))
+        means[POPULATION] = sums[POPULATION].astype('int64')
+        parts.extend(_scoped(means, level, keys))
+
+    return pd.concat(parts).sort_index()
+
+
+def weighted_rollup(weighted, level, scope=WORLD):
+    """Return the population-weighted means at `level` within `scope` as a flat frame.
+
+    Args:
+        weighted (pd.DataFrame): A cube from build_weighted_cube.
+        level (str): 'world', 'region' or 'sub-subregion'.
+        scope (str): "Whole World" or a region name.
+
+    Returns:
+        pd.DataFrame: Columns Year, region, sub-subregion, Population and one
+            per metric, ordered by year, region and sub-subregion.
+    """
+    try:
+        block = weighted.loc[(level, scope)]
+    except KeyError:
+        return pd.DataFrame(columns=[YEAR, REGION, 'sub-subregion', POPULATION])
+    return block.reset_index()
+
+
+def rollup(cube, level, scope=WORLD, stat='mean'):
+    """Return one statistic of every metric at `level` within `scope` as a flat frame.
+
+    Args:
+        cube (pd.DataFrame): A cube from build_cube.
+        level (str): 'world', 'region' or 'sub-subregion'.
+        scope (str): "Whole World" or a region name.
+        stat (str): One of CUBE_STATS.
+
+    Returns:
+        pd.DataFrame: Columns Year, region, sub-subregion and one per metric,
+            ordered by year, region and sub-subregion.
+    """
+    try:
+        block = cube.loc[(level, scope)]
+    except KeyError:
+        return pd.DataFrame(columns=[YEAR, REGION, 'sub-subregion'])
+    return block.xs(stat, axis=1, level=1).reset_index()
@@ -1,38 +1,69 @@
-import streamlit as st
-import pandas as pd
+import hashlib
+import inspect
+import logging
 import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
 
 from utils.constants import *
+from utils.correlation import ThresholdCorrelation
+from utils.countries import canonicalize, report_unmatched
+from utils.compact import compact
+from utils.cube import build_complete_cube, build_cube, build_weighted_cube
+from utils.forecast import TrendForecast
+from utils.ingest import SOURCE_COLUMNS, PanelStore
+from utils.leaderboard import Leaderboard
+from utils.mortality import MORTALITY_COLUMNS, MortalityTable, mortality_table
+from utils.neighbors import NeighborIndex
+from utils.nullity import NullityIndex
+from utils import ingest, metrics, shared
+from utils.snapshot import COMMON_CODE, file_digest, snapshot
 
-@st.cache()
-def load_mvp_data():
+logger = logging.getLogger(__name__)
+
+# Number of worker processes used to parse cold source files in DataStore.prefetch.
+# Excel parsing holds the GIL, so threads would not overlap; 1 reads serially.
+LOADER_WORKERS = int(os.environ.get("LOADER_WORKERS", os.cpu_count() or 1))
+
+# Store datasets with categorical strings and float32 metrics (see utils.compact); 0 keeps them as read
+COMPACT_DATASETS = os.environ.get("COMPACT_DATASETS", "1") != "0"
+
+# Columns compared against slider thresholds, which compaction leaves in float64
+EXACT_COLUMNS = {'hdi': ['hdi2019']}
+
+# Directory written by utils.ingest; when set, it replaces HappinessScores.xls
+HAPPINESS_PANEL = os.environ.get("HAPPINESS_PANEL")
+
+@snapshot('data/HappinessScores.xls', code=[ingest])
+def read_happiness():
     # Happiness data
     df = pd.read_excel('data/HappinessScores.xls')
-    df = df.rename(columns= {'Life Ladder':HAPPINESS_SCORE, 'year': YEAR, 'Country name': COUNTRY})
-    df_unfiltered = df.copy()
-    years_to_keep = list(range(2010, 2020, 1))
-    df = df[df[YEAR].isin(years_to_keep)]
-    return df, df_unfiltered
+    df = df.rename(columns=SOURCE_COLUMNS)
+    return df
 
-@st.cache()  
-def load_country_data(): 
+def read_happiness_panel():
+    if not HAPPINESS_PANEL:
+        return read_happiness()
+    df = PanelStore(HAPPINESS_PANEL).read()
+    return df.sort_values([COUNTRY, YEAR], kind='stable').reset_index(drop=True)
+
+# DataStore asks a reader's snapshot whether it is warm and for its version key
+read_happiness_panel.snapshot = lambda: PanelStore(HAPPINESS_PANEL) if HAPPINESS_PANEL else read_happiness.snapshot()
+
+@snapshot('data/un_geoscheme.xlsx', 'data/country_aliases.csv', code=[canonicalize])
+def read_countries(): 
     # Country data
     df_country = pd.read_excel('data/un_geoscheme.xlsx')
     df_country.columns = ['country', 'sub-subregion', 'subregion', 'region', 'unsd_m49_codes']
     df_country['country'] = df_country['country'].str.strip()
 
     # Match country names in happy dataset with country dataset
-    df_country['country'][df_country['country'] == 'Palestine'] = 'Palestinian Territories'
-    df_country['country'][df_country['country'] == 'Myanmar\xa0[Burma]'] = 'Myanmar'
-    df_country['country'][df_country['country'] == 'Timor-Leste\xa0[East Timor]'] = 'Timor Leste'
-    df_country['country'][df_country['country'] == 'China, Hong Kong Special Administrative Region'] = 'Hong Kong S.A.R. of China'
-    df_country['country'][df_country['country'] == "Democratic People's Republic of Korea\xa0[North Korea]"] = 'North Korea'
-    df_country['country'][df_country['country'] == 'Republic of Korea\xa0[South Korea]'] = 'South Korea'
-    df_country['country'][df_country['country'] == 'France\xa0[French Republic]'] = 'France'
-    df_country['country'][df_country['country'] == 'Czechia\xa0[Czech Republic]'] = 'Czech Republic'
-    df_country['country'][df_country['country'] == 'Eswatini\xa0[Swaziland]'] = 'Swaziland'
-    df_country['country'][df_country['country'] == 'Congo\xa0[Republic of the Congo]'] = 'Congo (Brazzaville)'
-    df_country['country'][df_country['country'] == 'DR Congo'] = 'Congo (Kinshasa)'
+    df_country['country'] = canonicalize(df_country['country'], 'geoscheme')
 
     # Add countries not in UN list
     df_country = df_country.append({'country': 'Ivory Coast', 'sub-subregion': 'Western Africa', 'subregion': 'Sub-Saharan Africa', 'region': 'Africa'}, ignore_index=True)
@@ -44,101 +75,394 @@ def load_country_data():
     df_country = df_country.rename(columns={"country": COUNTRY})
     return df_country
 
-@st.cache(show_spinner=False, suppress_st_warning=True)
-def load_data():
-    df, df_unfiltered = load_mvp_data()
-    df_country = load_country_data()
+@snapshot('data/hdi19.csv', 'data/country_aliases.csv', code=[canonicalize])
+def read_hdi():
+    df_hdi = pd.read_csv('data/hdi19.csv')
+    df_hdi = df_hdi.rename(columns={"country": COUNTRY})
+    df_hdi[COUNTRY] = canonicalize(df_hdi[COUNTRY], 'hdi')
+    return df_hdi
+
+@snapshot('data/Gender Development Index (GDI).xlsx', 'data/country_aliases.csv', code=[canonicalize])
+def read_gender():
+    df_gender = pd.read_excel('data/Gender Development Index (GDI).xlsx')
+    df_gender[COUNTRY] = df_gender[COUNTRY].str.strip()
+    df_gender[COUNTRY] = canonicalize(df_gender[COUNTRY], 'gdi')
+    return df_gender
+
+# The columns of the WHO mental health sheets the pages use
+WHO_COLUMNS = ['IndicatorCode', 'ParentLocation', 'Location', 'FactValueNumeric']
 
+@snapshot('data/MentalHealthAdmissionsPer100000.xlsx')
+def read_mh_admissions():
+    return pd.read_excel('data/MentalHealthAdmissionsPer100000.xlsx', usecols=WHO_COLUMNS)
+
+@snapshot('data/MentalHealthFacilitiesPer100000.xlsx')
+def read_mh_facilities():
+    return pd.read_excel('data/MentalHealthFacilitiesPer100000.xlsx', usecols=WHO_COLUMNS)
+
+@snapshot('data/MortalityData.xlsx', 'data/country_aliases.csv', code=[mortality_table, canonicalize])
+def read_suicide():
+    # The first two rows are export notes; only the columns the pages use are parsed
+    df_suicide = pd.read_excel('data/MortalityData.xlsx', header=2, usecols=list(MORTALITY_COLUMNS))
+    return mortality_table(df_suicide)
+
+@snapshot('data/Cities_by_Sunshine_Duration_2019_wikipedia.xlsx')
+def read_sunshine():
+    df_sunshine = pd.read_excel('data/Cities_by_Sunshine_Duration_2019_wikipedia.xlsx')
+    df_sunshine = df_sunshine.groupby(COUNTRY).mean().reset_index()
+    return df_sunshine
+
+@snapshot('data/population_world_bank.xlsx', 'data/country_aliases.csv', code=[canonicalize])
+def read_population():
+    # Long (country, year) table; the sheet's first row is a title, the second the header
+    df_pop = pd.read_excel('data/population_world_bank.xlsx', header=1)
+    years = [y for y in df_pop.columns[4:] if 2010 <= int(y) <= 2019]
+    df_pop = df_pop.melt(id_vars=['Country Name'], value_vars=years,
+        var_name=YEAR, value_name=POPULATION)
+    df_pop = df_pop.rename(columns={'Country Name': COUNTRY}).dropna(subset=[POPULATION])
+    df_pop[COUNTRY] = canonicalize(df_pop[COUNTRY], 'population')
+    df_pop[YEAR] = df_pop[YEAR].astype(int)
+    df_pop[POPULATION] = df_pop[POPULATION].astype('int64')
+    return df_pop.reset_index(drop=True)
+
+# Source readers, roughly slowest first so a prefetch pool starts on the
+# critical path (the WHO mortality sheet) before anything else
+READERS = {
+    'suicide': read_suicide,
+    'mh_facilities': read_mh_facilities,
+    'population': read_population,
+    'countries': read_countries,
+    'sunshine': read_sunshine,
+    'happiness_unfiltered': read_happiness_panel,
+    'gender': read_gender,
+    'mh_admissions': read_mh_admissions,
+    'hdi': read_hdi,
+}
+
+def _timed_read(name):
+    start = time.perf_counter()
+    result = READERS[name]()
+    return result, time.perf_counter() - start
+
+def _pool_context():
+    # Forking the multi-threaded server could copy a lock another thread holds
+    # (e.g. the metrics lock) into a worker, which would then deadlock. Workers
+    # fork from a single-threaded server process instead, which imports this
+    # module (and the main script) once, so workers start without re-importing them.
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['__main__', __name__])
+    return context
+
+def read_sources(names, workers=None):
+    """Read the given READERS on a process pool and yield (name, result, seconds).
+
+    Results are yielded in completion order. With a single worker (or a single
+    name) the readers simply run one after another in the calling process.
+    """
+    names = list(names)
+    workers = LOADER_WORKERS if workers is None else workers
+    if workers <= 1 or len(names) <= 1:
+        for name in names:
+            yield (name,) + _timed_read(name)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(names)), mp_context=_pool_context()) as pool:
+        futures = {pool.submit(_timed_read, name): name for name in names}
+        for future in as_completed(futures):
+            yield (futures[future],) + future.result()
+
+def build_happiness(df):
+    years_to_keep = list(range(2010, 2020, 1))
+    return df[df[YEAR].isin(years_to_keep)]
+
+def build_panel(df, df_country):
     # Country joined with happiness
     df = df.join(df_country.set_index(COUNTRY), on=COUNTRY)
     df[GDP] = df[LOG_GDP].map(lambda x: math.exp(x))
+    return df
 
-    # HDI
-    df_hdi = pd.read_csv('data/hdi19.csv')
-    df_hdi = df_hdi.rename(columns={"country": COUNTRY})
-    df_hdi[COUNTRY][df_hdi[COUNTRY] == 'Palestine'] = 'Palestinian Territories'
-    df_hdi[COUNTRY][df_hdi[COUNTRY] == 'Republic of the Congo'] = 'Congo (Brazzaville)'
-    df_hdi[COUNTRY][df_hdi[COUNTRY] == 'DR Congo'] = 'Congo (Kinshasa)'
-
-    # Pivoted
+def build_pivot(df, df_country):
     df_pivot = df.pivot_table(index=COUNTRY, columns=YEAR, values=HAPPINESS_SCORE).reset_index()
     df_pivot = df_pivot.join(df_country.set_index(COUNTRY), on=COUNTRY)
+    return df_pivot
 
-    # Gender
-    df_gender = pd.read_excel('data/Gender Development Index (GDI).xlsx')
-    df_gender[COUNTRY] = df_gender[COUNTRY].str.strip()
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Bolivia (Plurinational State of)'] = 'Bolivia'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Congo'] = 'Congo (Brazzaville)'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Congo (Democratic Republic of the)'] = 'Congo (Kinshasa)'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Czechia'] = 'Czech Republic'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Hong Kong, China (SAR)'] = 'Hong Kong S.A.R. of China'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Iran (Islamic Republic of)'] = 'Iran'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Lao People\'s Democratic Republic'] = 'Laos'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Moldova (Republic of)'] = 'Moldova'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Palestine, State of'] = 'Palestinian Territories'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Russian Federation'] = 'Russia'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Korea (Republic of)'] = 'South Korea'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Tanzania (United Republic of)'] = 'Tanzania'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Venezuela (Bolivarian Republic of)'] = 'Venezuela'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Viet Nam'] = 'Vietnam'
-    df_gender[COUNTRY][df_gender[COUNTRY] == 'Syrian Arab Republic'] = 'Syria'
-
-    # Mental Health
-    df_mh_adm = pd.read_excel('data/MentalHealthAdmissionsPer100000.xlsx')
-    df_mh_fac = pd.read_excel('data/MentalHealthFacilitiesPer100000.xlsx')
-
-    # Suicide
-    df_suicide = pd.read_excel ('data/MortalityData.xlsx')
-    new_header = df_suicide.iloc[1] # grab the first row for the header
-    df_suicide = df_suicide [2:] # take the data less the header row
-    df_suicide.columns = new_header
-    df_suicide['Period']= df_suicide['Period'].apply(lambda x: int(x))
-
-    # Sunshine
-    df_sunshine = pd.read_excel('data/Cities_by_Sunshine_Duration_2019_wikipedia.xlsx')
-    df_sunshine = df_sunshine.groupby(COUNTRY).mean().reset_index()
+def build_facts(df):
+    """Happiness panel indexed by a sorted (country_id, year) MultiIndex.
+
+    Country ids are assigned in (region, country) order, so each region is a
+    contiguous id range and a continent filter becomes one index slice.
+    """
+    facts = df.copy()
+    facts[REGION] = pd.Categorical(facts[REGION], categories=REGION_LIST)
+    facts['sub-subregion'] = facts['sub-subregion'].astype('category')
+
+    countries = facts[[REGION, COUNTRY]].drop_duplicates(COUNTRY).sort_values([REGION, COUNTRY])
+    ids = pd.Series(range(len(countries)), index=countries[COUNTRY].values)
+    facts.index = pd.MultiIndex.from_arrays(
+        [facts[COUNTRY].map(ids).to_numpy(dtype='int64'), facts[YEAR].values],
+        names=['country_id', 'year'],
+    )
+    return facts.sort_index()
+
+def build_regions(facts):
+    # First and last country id of every region in the fact table
+    ids = pd.Series(facts.index.get_level_values('country_id'), index=facts.index)
+    bounds = ids.groupby(facts[REGION], observed=True).agg(['min', 'max'])
+    return bounds.rename(columns={'min': 'first_id', 'max': 'last_id'})
+
+def build_facts_pivot(df_pivot, facts):
+    # The pivot re-indexed by the fact table's country ids
+    ids = pd.Series(facts.index.get_level_values('country_id'), index=facts[COUNTRY].values)
+    ids = ids[~ids.index.duplicated()]
+    df_pivot = df_pivot.set_index(df_pivot[COUNTRY].map(ids).astype('int64').rename('country_id'))
+    return df_pivot.sort_index()
+
+# Datasets computed from other datasets: name -> (builder, input dataset names)
+BUILDERS = {
+    'happiness': (build_happiness, ('happiness_unfiltered',)),
+    'panel': (build_panel, ('happiness', 'countries')),
+    'pivot': (build_pivot, ('panel', 'countries')),
+    'facts': (build_facts, ('panel',)),
+    'regions': (build_regions, ('facts',)),
+    'facts_pivot': (build_facts_pivot, ('pivot', 'facts')),
+    'cube': (build_cube, ('facts',)),
+    'complete_cube': (build_complete_cube, ('facts',)),
+    'weighted_cube': (build_weighted_cube, ('facts', 'population')),
+    'hdi_correlation': (ThresholdCorrelation, ('facts', 'hdi')),
+    'nullity': (NullityIndex, ('happiness_unfiltered',)),
+    'mortality': (MortalityTable, ('suicide',)),
+    'leaderboard': (Leaderboard, ('facts_pivot',)),
+    'neighbors': (NeighborIndex, ('happiness',)),
+    'forecast': (TrendForecast, ('happiness',)),
+}
+
+DATASETS = list(READERS) + list(BUILDERS)
+
+# Datasets whose builders load sklearn or scipy; the page using them builds
+# them on first use instead of Home prefetching them with the rest
+ON_DEMAND = ('neighbors', 'forecast')
+PREFETCH_DATASETS = [name for name in DATASETS if name not in ON_DEMAND]
+
+def _deep_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+class DataStore:
+    """Lazily loaded, memoized access to every dataset used by the pages.
+
+    Each dataset is an attribute (``store.hdi``, ``store.panel``, ...) that is
+    only read or built the first time it is accessed, so a page pays just for
+    the sources it touches. ``prefetch`` loads several cold sources at once on
+    a process pool, and ``stats`` reports the load time and memory of each
+    dataset loaded so far.
+    """
+
+    def __init__(self):
+        self._frames = {}
+        self._seconds = {}
+        self._raw_bytes = {}
+        self._shared = set()
+        self._fingerprints = {}
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        if name in DATASETS:
+            return self.get(name)
+        raise AttributeError(name)
+
+    def get(self, name):
+        if name in self._frames:
+            metrics.count('store', name, True)
+            return self._frames[name]
+
+        with self._lock, metrics.span(f'data:{name}', 'data'):
+            if name not in self._frames and not self._attach(name):
+                metrics.count('store', name, False)
+                if name in READERS:
+                    _, frame, seconds = next(read_sources([name]))
+                else:
+                    # Resolve inputs first so only the build itself is timed
+                    builder, inputs = BUILDERS[name]
+                    args = [self.get(dep) for dep in inputs]
+                    start = time.perf_counter()
+                    frame = builder(*args)
+                    seconds = time.perf_counter() - start
+                self._store(name, frame, seconds)
+        return self._frames[name]
+
+    def _store(self, name, frame, seconds):
+        if isinstance(frame, pd.DataFrame):
+            if name in READERS:
+                self._raw_bytes[name] = _deep_bytes(frame)
+            if COMPACT_DATASETS:
+                frame = compact(frame, keep=EXACT_COLUMNS.get(name, ()))
+        if shared.SHARED_DIR and shared.publish(frame, name, self.fingerprint(name)):
+            # Swap the private copy for the mapping every other process uses
+            frame = shared.attach(name, self.fingerprint(name))
+            self._shared.add(name)
+        self._frames[name] = frame
+        self._seconds[name] = seconds
+        logger.info("loaded %s in %.3fs", name, seconds)
+
+    def _attach(self, name):
+        # Map a dataset another process already published, see utils.shared
+        if not shared.SHARED_DIR:
+            return False
+        start = time.perf_counter()
+        frame = shared.attach(name, self.fingerprint(name))
+        metrics.count('shared', name, frame is not None)
+        if frame is None:
+            return False
+        self._shared.add(name)
+        self._frames[name] = frame
+        self._seconds[name] = time.perf_counter() - start
+        logger.info("attached shared %s in %.3fs", name, self._seconds[name])
+        return True
 
-    # Population
-    df_pop = pd.read_excel('data/population_world_bank.xlsx')
-    df_pop = df_pop.fillna(0)
-
-    i = 0
-    for col in df_pop.columns:
-        if i > 3:
-            df_pop[col] = df_pop[col].astype(int)
-        i += 1
-
-    new_header = df_pop.iloc[0] # grab the first row for the header
-    df_pop = df_pop[1:] # take the data less the header row
-    df_pop.columns = new_header
-    df_pop = df_pop.rename(columns={'Country Name': COUNTRY})
-
-    i = 0
-    for col in df_pop.columns:
-        if i > 3:
-            if int(col) < 2010 or int(col) > 2019:
-                df_pop = df_pop.drop(col, axis=1)
-        i += 1
-    
-    # df_pop = df_pop.melt(id_vars=[COUNTRY], value_vars=[y for y in range(2010,2020)],
-    #        var_name=YEAR, value_name=POPULATION)
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Congo, Rep.'] = 'Congo (Brazzaville)'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Congo, Dem. Rep.'] = 'Congo (Kinshasa)'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Egypt, Arab Rep.'] = 'Egypt'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Gambia, The'] = 'Gambia'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Hong Kong SAR, China'] = 'Hong Kong S.A.R. of China'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Iran, Islamic Rep.'] = 'Iran'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Kyrgyz Republic'] = 'Kyrgyzstan'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Lao PDR'] = 'Laos'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Russian Federation'] = 'Russia'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Slovak Republic'] = 'Slovakia'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Korea, Rep.'] = 'South Korea'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Syrian Arab Republic'] = 'Syria'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Venezuela, RB'] = 'Venezuela'
-    # df_pop[COUNTRY][df_pop[COUNTRY] == 'Yemen, Rep.'] = 'Yemen'
-
-    # df_pop['Log Population'] = df_pop[POPULATION].map(lambda x: math.log(x+2))
-    
-    # df_pop_merged = df.merge(df_pop, on=[COUNTRY, YEAR])
-
-    return df, df_unfiltered, df_country, df_pivot, df_hdi, df_gender, df_mh_adm, df_mh_fac, df_suicide, df_sunshine
\ No newline at end of file
+    def fingerprint(self, name):
+        """Version key of a dataset, derived from its source file hashes.
+
+        Also covers the code shaping the stored dataset: a builder's defining
+        module (and utils.constants) and the compaction settings, so editing
+        either yields a new key rather than a stale shared or cached version.
+        Computed once per dataset, so derived results can be cached under it
+        without hashing the frame itself.
+        """
+        if name not in self._fingerprints:
+            compaction = [str(COMPACT_DATASETS), file_digest(inspect.getsourcefile(compact)),
+                          repr(EXACT_COLUMNS.get(name, ()))]
+            if name in READERS:
+                key = ':'.join([READERS[name].snapshot().fingerprint()] + compaction)
+            else:
+                builder, inputs = BUILDERS[name]
+                code = [file_digest(inspect.getsourcefile(obj)) for obj in (builder,) + COMMON_CODE]
+                key = ':'.join([name] + code + compaction + [self.fingerprint(dep) for dep in inputs])
+            self._fingerprints[name] = hashlib.sha1(key.encode()).hexdigest()
+        return self._fingerprints[name]
+
+    def prefetch(self, names=None, workers=None):
+        """Load several datasets at once, reading cold sources concurrently.
+
+        Args:
+            names: Dataset names to load; defaults to every dataset.
+            workers: Pool size; defaults to LOADER_WORKERS.
+        """
+        names = DATASETS if names is None else names
+        with self._lock, metrics.span('data:prefetch', 'data'):
+            # Sources still needed: a loaded or shared dataset needs none of its inputs
+            sources, builds = set(), set()
+            pending = list(names)
+            while pending:
+                name = pending.pop()
+                if name in self._frames or self._attach(name):
+                    continue
+                if name in READERS:
+                    sources.add(name)
+                else:
+                    builds.add(name)
+                    pending.extend(BUILDERS[name][1])
+
+            missing = [n for n in READERS if n in sources and n not in self._frames]
+            # Sources with a valid snapshot load faster here than via a pool
+            cold = [n for n in missing if not READERS[n].snapshot().is_valid()]
+            for name in missing:
+                if name not in cold:
+                    self.get(name)
+            for name, frame, seconds in read_sources(cold, workers):
+                # Read in a worker process, whose own counters are lost
+                metrics.count('snapshot', READERS[name].__name__, False)
+                metrics.count('store', name, False)
+                self._store(name, frame, seconds)
+                # Build what this source completes (e.g. the happiness + geoscheme
+                # join) while the pool is still reading the rest
+                self._build_ready(builds)
+
+        for name in names:
+            self.get(name)
+
+    def _build_ready(self, builds):
+        # Build, and drop from `builds`, every dataset whose inputs are all loaded
+        ready = True
+        while ready:
+            ready = [n for n in builds if all(dep in self._frames for dep in BUILDERS[n][1])]
+            for name in ready:
+                builds.discard(name)
+                self.get(name)
+
+    def region_slice(self, frame, region):
+        """Rows of `facts` or `facts_pivot` in one region, as a single index slice."""
+        if region not in self.regions.index:
+            return frame.iloc[:0]
+        first, last = self.regions.loc[region, ['first_id', 'last_id']]
+        return frame.loc[first:last]
+
+    def stats(self):
+        """Return a DataFrame of load seconds and deep memory bytes per loaded dataset.
+
+        raw_bytes is a source frame's size as read, bytes its size as
+        stored, after compaction. Built datasets have no raw_bytes: they are
+        built from already compacted inputs, so their size as built would
+        not show what compaction saved. Shared datasets map most of their
+        bytes from a file other processes map too (see utils.shared).
+        """
+        rows = []
+        for name, frame in self._frames.items():
+            if isinstance(frame, pd.DataFrame):
+                nbytes = _deep_bytes(frame)
+            else:
+                # Index structures built on top of the frames report their own size
+                nbytes = frame.nbytes
+            rows.append({
+                'dataset': name,
+                'seconds': self._seconds[name],
+                'rows': len(frame),
+                'raw_bytes': self._raw_bytes.get(name),
+                'bytes': int(nbytes),
+                'shared': name in self._shared,
+            })
+        stats = pd.DataFrame(rows, columns=['dataset', 'seconds', 'rows', 'raw_bytes', 'bytes', 'shared'])
+        return stats.astype({'raw_bytes': 'Int64'})
+
+    def country_report(self):
+        """Log and return the happiness countries each loaded secondary dataset misses."""
+        datasets = {'geoscheme': 'countries', 'hdi': 'hdi', 'gdi': 'gender', 'population': 'population'}
+        return report_unmatched(self.panel[COUNTRY], {
+            key: self._frames[name][COUNTRY]
+            for key, name in datasets.items() if name in self._frames
+        })
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide DataStore shared by every session.
+
+    A plain module-level singleton: st.cache would hash this function's code
+    and dependencies on every call just to hand back the same object.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DataStore()
+    return _store
+
+def load_mvp_data():
+    store = get_store()
+    return store.happiness, store.happiness_unfiltered
+
+def load_country_data(): 
+    return get_store().countries
+
+def load_data():
+    store = get_store()
+    store.prefetch([
+        'panel', 'happiness_unfiltered', 'countries', 'pivot', 'hdi', 'gender',
+        'mh_admissions', 'mh_facilities', 'suicide', 'sunshine',
+    ])
+    store.country_report()
+    return (
+        store.panel, store.happiness_unfiltered, store.countries, store.pivot, store.hdi,
+        store.gender, store.mh_admissions, store.mh_facilities, store.suicide, store.sunshine,
+    )
@@ -0,0 +1,126 @@
+"""
+Process-wide LRU of serialized Plotly figures.
+
+Building a plotly express figure (and letting st.plotly_chart validate it
+again) dominates reruns of pages with animated charts. Figures are built once
+per key, serialized to the exact JSON spec st.plotly_chart would send, and
+kept in a size-bounded LRU shared by every session. On a hit the cached spec
+is sent to the browser as is.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+FIGURE_CACHE_BYTES = int(os.environ.get("FIGURE_CACHE_BYTES", 64 * 1024 * 1024))
+
+
+def to_spec(fig):
+    """Serialize a figure the way st.plotly_chart does."""
+    import plotly.utils
+
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+class FigureCache:
+    """LRU of figure specs bounded by their total size in bytes.
+
+    Args:
+        max_bytes (int): Evict least recently used specs beyond this size.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._specs = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._specs)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key, build):
+        """Return the spec cached under `key`, calling `build()` for a figure on a miss."""
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+                metrics.count("figure", key[0], True)
+                return spec
+            self.misses += 1
+        metrics.count("figure", key[0], False)
+
+        # Built outside the lock; two sessions missing at once both build, one wins
+        with metrics.span(f"figure:{key[0]}", "figure"):
+            spec = to_spec(build())
+        with self._lock:
+            if key not in self._specs:
+                self._specs[key] = spec
+                self._bytes += len(spec)
+            while self._bytes > self.max_bytes and len(self._specs) > 1:
+                _, evicted = self._specs.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+        return spec
+
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._specs),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+figure_cache = FigureCache()
+metrics.register_gauges("figure_cache", figure_cache.stats)
+
+
+def plotly_chart_spec(spec, container=None, use_container_width=False):
+    """st.plotly_chart for an already serialized figure spec, skipping validation."""
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.figure.spec = spec
+    proto.figure.config = json.dumps({"showLink": False, "linkText": False})
+    if "theme" in proto.DESCRIPTOR.fields_by_name:
+        proto.theme = "streamlit"
+    return (container or st._main)._enqueue("plotly_chart", proto)
+
+
+def cached_plotly_chart(key, build, container=None):
+    """Show the figure cached under `key`, building it with `build()` on a miss.
+
+    Args:
+        key (tuple): Everything the figure depends on, including a data
+            version; the first element names the chart in metrics.
+        build (callable): Returns the Plotly figure.
+        container: Streamlit container to draw in, the main area by default.
+    """
+    return plotly_chart_spec(figure_cache.get(key, build), container)
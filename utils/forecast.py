@@ -0,0 +1,135 @@
+"""
+Short-horizon happiness forecasts for every country at once.
+
+Each country's happiness scores are fitted with a straight-line trend over
+the observed years and extrapolated a few years past the last one, with
+prediction intervals from the residual spread of the fit. All countries are
+solved together: the (country x year) pivot becomes one matrix, missing
+years are masked out of the sums, and the least-squares slope, intercept and
+residual variance of every row come from a handful of vectorized reductions
+instead of one fit per country.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import *
+
+LOWER = "Lower"
+UPPER = "Upper"
+
+
+class TrendForecast:
+    """Linear-trend forecast with prediction intervals for every country of a panel.
+
+    Series with fewer than three observed years have no forecast.
+
+    Args:
+        happiness (pd.DataFrame): The happiness panel, or any frame with a
+            Year, a Happiness Score and a `by` column.
+        horizon (int): Number of years forecast past the last panel year.
+        level (float): Coverage of the prediction intervals.
+        by (str): Column naming the series, e.g. 'sub-subregion' for a rollup.
+    """
+
+    def __init__(self, happiness, horizon=3, level=0.95, by=COUNTRY):
+        # Imported here so pages that never build a forecast do not load scipy
+        from scipy import stats
+
+        pivot = happiness.pivot_table(index=by, columns=YEAR, values=HAPPINESS_SCORE, observed=True)
+        Y = pivot.to_numpy(dtype=float)
+        observed = ~np.isnan(Y)
+        years = pivot.columns.to_numpy(dtype='int64')
+        self.names = pivot.index.to_numpy(dtype=object)
+        self.rows = {name: i for i, name in enumerate(self.names)}
+        self.years = np.arange(years[-1] + 1, years[-1] + 1 + horizon)
+
+        # Masked least squares, one row per series
+        n = observed.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = (observed * years).sum(axis=1) / n
+            y_mean = np.nansum(Y, axis=1) / n
+            dx = np.where(observed, years - x_mean[:, None], 0.0)
+            dy = np.where(observed, Y - y_mean[:, None], 0.0)
+            sxx = (dx * dx).sum(axis=1)
+            self.slope = (dx * dy).sum(axis=1) / sxx
+            residuals = dy - self.slope[:, None] * dx
+            variance = (residuals * residuals).sum(axis=1) / (n - 2)
+
+            ahead = self.years - x_mean[:, None]
+            self.mean = y_mean[:, None] + self.slope[:, None] * ahead
+            spread = np.sqrt(variance[:, None] * (1 + 1 / n[:, None] + ahead ** 2 / sxx[:, None]))
+            quantile = stats.t.ppf(0.5 + level / 2, np.maximum(n - 2, 1))
+        half_width = quantile[:, None] * spread
+
+        valid = n >= 3
+        self.mean[~valid] = np.nan
+        self.lower = self.mean - half_width
+        self.upper = self.mean + half_width
+
+        # Last observation, where each forecast line starts
+        last = years.size - 1 - np.argmax(observed[:, ::-1], axis=1)
+        self.last_year = years[last]
+        self.last_value = Y[np.arange(len(Y)), last]
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def nbytes(self):
+        arrays = [self.names, self.slope, self.mean, self.lower, self.upper, self.last_year, self.last_value]
+        return sum(a.nbytes for a in arrays)
+
+    def series(self, name):
+        """The forecast of one series, starting from its last observed year.
+
+        Args:
+            name (str): Country name, or the `by` value of the series.
+
+        Returns:
+            pd.DataFrame: Columns Year, Happiness Score, Lower and Upper, or
+                None if the series has no forecast.
+        """
+        i = self.rows.get(name)
+        if i is None or np.isnan(self.mean[i, 0]):
+            return None
+        last = self.last_value[i]
+        return pd.DataFrame({
+            YEAR: np.concatenate([[self.last_year[i]], self.years]),
+            HAPPINESS_SCORE: np.concatenate([[last], self.mean[i]]),
+            LOWER: np.concatenate([[last], self.lower[i]]),
+            UPPER: np.concatenate([[last], self.upper[i]]),
+        })
+
+
+def add_forecast(fig, forecast, name, color=None, band=True):
+    """Continue the line of series `name` in `fig` with its dashed forecast.
+
+    Args:
+        fig (go.Figure): A figure with Year on the x axis.
+        forecast (TrendForecast): Forecasts of the current data version.
+        name (str): Country name, or the `by` value of the series.
+        color (str): Line color, e.g. the color of the observed line.
+        band (bool): Also shade the prediction interval.
+
+    Returns:
+        go.Figure: `fig`, unchanged if the series has no forecast.
+    """
+    import plotly.graph_objects as go
+
+    df = forecast.series(name)
+    if df is None:
+        return fig
+    if band:
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([df[YEAR], df[YEAR][::-1]]),
+            y=np.concatenate([df[UPPER], df[LOWER][::-1]]),
+            fill='toself', fillcolor=color, opacity=0.2, line=dict(width=0),
+            hoverinfo='skip', showlegend=False, name=f'{name} forecast interval',
+        ))
+    fig.add_trace(go.Scatter(
+        x=df[YEAR], y=df[HAPPINESS_SCORE], mode='lines', line=dict(color=color, dash='dash'),
+        showlegend=False, name=f'{name} forecast',
+        hovertemplate=f'{name} forecast<br>%{{x}}: %{{y:.2f}}<extra></extra>',
+    ))
+    return fig
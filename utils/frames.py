@@ -0,0 +1,154 @@
+"""
+Compact encoding of animated plotly express figures.
+
+plotly express writes every animation frame as a full copy of its traces:
+the same names, colors, axis references and hover templates per frame, hover
+columns that repeat the frame value or the trace's own locations, and float64
+values with far more digits than any chart shows. Plotly.animate merges a
+frame into the current traces, so a frame only needs the attributes that
+actually change. compact_frames keeps those, stores everything shared by all
+frames once on the base traces, rounds values to display precision and drops
+hover columns the template does not need.
+"""
+
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FRAMES = os.environ.get("COMPACT_FRAMES", "1") != "0"
+
+# Trace attributes that may hold the same values as a hover column, with the
+# name the hover template uses for them
+_HOVER_ALIASES = {"locations": "location", "x": "x", "y": "y", "z": "z", "hovertext": "hovertext", "text": "text"}
+_ROUNDED = ("x", "y", "z")
+_CUSTOMDATA_REF = re.compile(r"%\{customdata\[(\d+)\](:[^}]*)?\}")
+
+# Serialized size of every chart built through compact_frames: name -> (full, compact)
+payload_bytes = {}
+
+
+def spec_bytes(fig):
+    import plotly.utils
+
+    return len(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def _same(a, b):
+    import plotly.utils
+
+    return json.dumps(a, cls=plotly.utils.PlotlyJSONEncoder, sort_keys=True) == \
+        json.dumps(b, cls=plotly.utils.PlotlyJSONEncoder, sort_keys=True)
+
+
+def _round(values, decimals):
+    values = np.asarray(values)
+    if values.dtype.kind != "f":
+        return values
+    # float32 columns would otherwise serialize with float64 noise digits
+    return np.round(values.astype(float), decimals)
+
+
+def _compact_hover(trace):
+    """Inline constant hover columns, point duplicated ones at the trace attribute, drop the rest."""
+    template = trace.get("hovertemplate")
+    if template is None:
+        return
+
+    # hover_name often repeats the x labels or locations
+    hovertext = trace.get("hovertext")
+    if hovertext is not None and "%{hovertext}" in template:
+        for attr in ("locations", "x", "y"):
+            values = trace.get(attr)
+            if values is not None and len(values) == len(hovertext) and list(values) == list(hovertext):
+                trace["hovertemplate"] = template = template.replace("%{hovertext}", "%{" + _HOVER_ALIASES[attr] + "}")
+                del trace["hovertext"]
+                break
+
+    customdata = trace.get("customdata")
+    if customdata is None:
+        return
+
+    columns = np.asarray(customdata, dtype=object)
+    if columns.ndim == 1:
+        columns = columns[:, None]
+    kept = []
+
+    def replace(match):
+        j, fmt = int(match.group(1)), match.group(2) or ""
+        column = list(columns[:, j])
+        if not fmt and column and all(value == column[0] for value in column):
+            return str(column[0])
+        for attr, alias in _HOVER_ALIASES.items():
+            values = trace.get(attr)
+            if values is not None and len(values) == len(column) and list(values) == column:
+                return "%{" + alias + fmt + "}"
+        if j not in kept:
+            kept.append(j)
+        return "%{customdata[" + str(kept.index(j)) + "]" + fmt + "}"
+
+    trace["hovertemplate"] = _CUSTOMDATA_REF.sub(replace, template)
+    if kept:
+        trace["customdata"] = columns[:, kept]
+    else:
+        del trace["customdata"]
+
+
+def _compact_trace(trace, decimals):
+    _compact_hover(trace)
+    for attr in _ROUNDED:
+        if trace.get(attr) is not None:
+            trace[attr] = _round(trace[attr], decimals)
+    if trace.get("customdata") is not None:
+        trace["customdata"] = np.array(
+            [[round(v, decimals) if isinstance(v, (float, np.floating)) else v for v in row] for row in trace["customdata"]],
+            dtype=object,
+        )
+
+
+def _drop_shared(fig):
+    """Remove frame attributes equal to the base trace's in every frame."""
+    frames = fig.get("frames") or []
+    for i, base in enumerate(fig["data"]):
+        traces = [frame["data"][i] for frame in frames if i < len(frame["data"])]
+        if len(traces) != len(frames):
+            continue
+        for key in list(base):
+            if key == "type":
+                continue
+            if all(key in trace and _same(trace[key], base[key]) for trace in traces):
+                for trace in traces:
+                    del trace[key]
+
+
+def compact_frames(fig, decimals=3, name=None):
+    """Compact an animated figure for sending to the browser.
+
+    Args:
+        fig (go.Figure): Figure built with animation_frame.
+        decimals (int): Digits kept for x/y/z and numeric hover values.
+        name (str): Label under which the payload sizes are recorded.
+
+    Returns:
+        dict: The compacted figure, ready for st.plotly_chart or the figure
+        cache. The figure itself is returned unchanged when COMPACT_FRAMES=0.
+    """
+    if not COMPACT_FRAMES:
+        return fig
+
+    compact = fig.to_dict()
+    for trace in compact["data"]:
+        _compact_trace(trace, decimals)
+    for frame in compact.get("frames") or []:
+        for trace in frame["data"]:
+            _compact_trace(trace, decimals)
+    _drop_shared(compact)
+
+    if name is not None:
+        payload_bytes[name] = (spec_bytes(fig), spec_bytes(compact))
+        logger.info("%s payload: %d -> %d bytes", name, *payload_bytes[name])
+    return compact
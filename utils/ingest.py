@@ -0,0 +1,219 @@
+"""
+Chunked ingestion of happiness panels too large to load at once.
+
+A CSV or Parquet panel is streamed in chunks. The column selection and year
+window are applied while reading: CSV columns are skipped by the parser, and
+Parquet reads push both down to pyarrow so unneeded columns and row groups
+are never decoded. Each chunk is renamed to the app's column names, downcast
+(int16 year, float32 metrics) and appended to one Arrow IPC file per year,
+so memory use is bounded by the chunk size, not the input size.
+
+PanelStore reads such a directory back, optionally restricted to some years
+and columns. Setting HAPPINESS_PANEL to the directory makes the pages use it
+in place of data/HappinessScores.xls.
+
+Usage, from the repository root:
+    python -m utils.ingest panel.csv out_dir [--years 2005 2020] [--chunksize N]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from utils.constants import *
+from utils.snapshot import file_digest
+
+logger = logging.getLogger(__name__)
+
+# Source column -> app column, for the names the WHR export spells differently
+SOURCE_COLUMNS = {
+    'Country name': COUNTRY,
+    'year': YEAR,
+    'Life Ladder': HAPPINESS_SCORE,
+}
+
+PANEL_COLUMNS = [
+    COUNTRY, YEAR, HAPPINESS_SCORE, LOG_GDP, SOCIAL_SUPPORT, LIFE_EXPECTANCY,
+    FREEDOM, GENEROSITY, CORRUPTION, POSITIVE_AFFECT, NEGATIVE_AFFECT,
+]
+
+MANIFEST = "manifest.json"
+PANEL_VERSION = 1
+
+
+def downcast(chunk):
+    """Year to int16 and every other numeric column to float32."""
+    types = {col: 'float32' for col in chunk.select_dtypes('number').columns}
+    types[YEAR] = 'int16'
+    return chunk.astype(types)
+
+
+def _csv_chunks(src, wanted, years, chunksize):
+    usecols = lambda col: SOURCE_COLUMNS.get(col, col) in wanted
+    for chunk in pd.read_csv(src, usecols=usecols, chunksize=chunksize):
+        chunk = chunk.rename(columns=SOURCE_COLUMNS)
+        yield chunk[chunk[YEAR].between(*years)]
+
+
+def _parquet_chunks(src, wanted, years, chunksize):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(src, format="parquet")
+    columns = [col for col in dataset.schema.names if SOURCE_COLUMNS.get(col, col) in wanted]
+    year = ds.field(next(col for col in columns if SOURCE_COLUMNS.get(col, col) == YEAR))
+    batches = dataset.to_batches(
+        columns=columns, filter=(year >= years[0]) & (year <= years[1]), batch_size=chunksize,
+    )
+    for batch in batches:
+        yield batch.to_pandas().rename(columns=SOURCE_COLUMNS)
+
+
+def read_chunks(src, columns=None, years=(2005, 2020), chunksize=100000):
+    """Yield renamed frames of at most `chunksize` rows of `src` within `years`.
+
+    Args:
+        src (str): CSV or Parquet (file or directory) path.
+        columns (list): App column names to keep; PANEL_COLUMNS by default.
+            Country and Year are always kept.
+        years (tuple): Inclusive (first, last) year window.
+        chunksize (int): Rows read at a time.
+    """
+    wanted = set(columns or PANEL_COLUMNS) | {COUNTRY, YEAR}
+    is_parquet = os.path.isdir(src) or src.endswith((".parquet", ".pq"))
+    reader = _parquet_chunks if is_parquet else _csv_chunks
+    return reader(src, wanted, years, chunksize)
+
+
+def _schema(chunk):
+    fields = [pa.field(COUNTRY, pa.string()), pa.field(YEAR, pa.int16())]
+    for col in chunk.columns.drop([COUNTRY, YEAR]):
+        kind = pa.float32() if pd.api.types.is_numeric_dtype(chunk[col]) else pa.string()
+        fields.append(pa.field(col, kind))
+    return pa.schema(fields)
+
+
+def ingest(src, out, columns=None, years=(2005, 2020), chunksize=100000):
+    """Stream `src` into a year-partitioned Arrow store at `out`.
+
+    Args:
+        src (str): CSV or Parquet path.
+        out (str): Output directory; earlier partitions in it are replaced.
+        columns, years, chunksize: As for read_chunks.
+
+    Returns:
+        tuple: (rows written, seconds taken)
+    """
+    start = time.perf_counter()
+    os.makedirs(out, exist_ok=True)
+    for name in os.listdir(out):
+        if name == MANIFEST or name.endswith(".arrow"):
+            os.remove(os.path.join(out, name))
+
+    schema, writers, rows = None, {}, {}
+    try:
+        for chunk in read_chunks(src, columns, years, chunksize):
+            chunk = downcast(chunk.dropna(subset=[COUNTRY]))
+            if schema is None:
+                schema = _schema(chunk)
+            for year, part in chunk.groupby(YEAR, sort=False):
+                year = int(year)
+                if year not in writers:
+                    sink = pa.OSFile(os.path.join(out, f"{YEAR}={year}.arrow"), "wb")
+                    writers[year] = (sink, pa.ipc.new_file(sink, schema))
+                table = pa.Table.from_pandas(part, preserve_index=False).select(schema.names).cast(schema)
+                writers[year][1].write_table(table)
+                rows[year] = rows.get(year, 0) + len(part)
+            logger.info("ingested %d rows", sum(rows.values()))
+    finally:
+        for sink, writer in writers.values():
+            writer.close()
+            sink.close()
+
+    partitions = {}
+    for year in sorted(rows):
+        name = f"{YEAR}={year}.arrow"
+        partitions[str(year)] = {"file": name, "rows": rows[year], "sha1": file_digest(os.path.join(out, name))}
+    manifest = {
+        "version": PANEL_VERSION,
+        "columns": schema.names if schema is not None else [COUNTRY, YEAR],
+        "partitions": partitions,
+    }
+    with open(os.path.join(out, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    return sum(rows.values()), time.perf_counter() - start
+
+
+class PanelStore:
+    """Read side of a directory written by ingest.
+
+    Also stands in for a loader snapshot in DataStore: ``is_valid`` and
+    ``fingerprint`` have the same meaning as on utils.snapshot.Snapshot.
+
+    Args:
+        path (str): The ingest output directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _manifest(self):
+        with open(os.path.join(self.path, MANIFEST)) as f:
+            return json.load(f)
+
+    def is_valid(self):
+        try:
+            return self._manifest()["version"] == PANEL_VERSION
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def fingerprint(self):
+        manifest = self._manifest()
+        digests = [manifest["partitions"][year]["sha1"] for year in sorted(manifest["partitions"])]
+        return hashlib.sha1("".join(manifest["columns"] + digests).encode()).hexdigest()
+
+    @property
+    def years(self):
+        return sorted(int(year) for year in self._manifest()["partitions"])
+
+    def read(self, years=None, columns=None):
+        """Load the partitions of `years` (all by default), keeping only `columns`.
+
+        Returns:
+            pd.DataFrame: One row per country and year, ordered by year.
+        """
+        manifest = self._manifest()
+        names = manifest["columns"] if columns is None else [c for c in manifest["columns"] if c in columns]
+        tables = []
+        for year in sorted(manifest["partitions"], key=int):
+            if years is not None and int(year) not in years:
+                continue
+            path = os.path.join(self.path, manifest["partitions"][year]["file"])
+            with pa.memory_map(path, "r") as source:
+                tables.append(pa.ipc.open_file(source).read_all().select(names))
+        if not tables:
+            return pd.DataFrame(columns=names)
+        return pa.concat_tables(tables).to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest a large happiness panel into a year-partitioned store.")
+    parser.add_argument("src", help="input CSV or Parquet")
+    parser.add_argument("out", help="output directory")
+    parser.add_argument("--years", type=int, nargs=2, default=(2005, 2020), metavar=("FIRST", "LAST"))
+    parser.add_argument("--columns", nargs="+", help="app column names to keep (default: the WHR columns)")
+    parser.add_argument("--chunksize", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    rows, seconds = ingest(args.src, args.out, args.columns, tuple(args.years), args.chunksize)
+    print(f"ingested {rows} rows in {seconds:.2f}s ({rows / seconds if seconds else 0:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
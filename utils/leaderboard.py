@@ -0,0 +1,117 @@
+"""
+Precomputed happiness leaderboards.
+
+For the whole world and for each region, countries are sorted by happiness
+score once per year and once by their 2010-2019 average. Top-k and bottom-k
+queries are then slices of a sorted array and the rank of a country is a
+dict lookup, instead of idxmax, idxmin and row means over the pivot on every
+rerun.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import *
+
+WORLD = "Whole World"
+AVERAGE = "average"
+RANK = "Rank"
+
+
+class _Board:
+    """The countries of one scope and period, ordered by score."""
+
+    def __init__(self, countries, scores):
+        present = ~np.isnan(scores)
+        countries, scores = countries[present], scores[present]
+        # Stable sorts keep the pivot's row order among ties, like idxmax and idxmin
+        high = np.argsort(-scores, kind='stable')
+        low = np.argsort(scores, kind='stable')
+        self.countries, self.scores = countries[high], scores[high]
+        self.low_countries, self.low_scores = countries[low], scores[low]
+        self.ranks = {country: rank for rank, country in enumerate(self.countries, start=1)}
+
+    def __len__(self):
+        return len(self.countries)
+
+    @property
+    def nbytes(self):
+        return 2 * (self.countries.nbytes + self.scores.nbytes)
+
+
+class Leaderboard:
+    """Happiness rankings of every region and period.
+
+    Args:
+        pivot (pd.DataFrame): One row per country with its region and one
+            happiness score column per year, e.g. the facts_pivot dataset.
+    """
+
+    def __init__(self, pivot):
+        self.years = sorted(c for c in pivot.columns if isinstance(c, (int, np.integer)))
+        values = pivot[self.years].to_numpy(dtype=float)
+        counts = np.count_nonzero(~np.isnan(values), axis=1)
+        average = np.nansum(values, axis=1) / np.where(counts > 0, counts, np.nan)
+
+        countries = pivot[COUNTRY].to_numpy(dtype=object)
+        regions = pivot[REGION].to_numpy(dtype=object)
+        self.boards = {}
+        for scope in [WORLD] + REGION_LIST:
+            rows = np.ones(len(pivot), dtype=bool) if scope == WORLD else regions == scope
+            for j, year in enumerate(self.years):
+                self.boards[scope, year] = _Board(countries[rows], values[rows, j])
+            self.boards[scope, AVERAGE] = _Board(countries[rows], average[rows])
+
+    def __len__(self):
+        return len(self.boards)
+
+    @property
+    def nbytes(self):
+        return sum(board.nbytes for board in self.boards.values())
+
+    def _board(self, scope, period):
+        try:
+            return self.boards[scope, period]
+        except KeyError:
+            raise KeyError(f"No leaderboard for {scope!r} in {period!r}") from None
+
+    def top(self, scope=WORLD, period=AVERAGE, k=10):
+        """The `k` happiest countries of `scope` in `period`, happiest first.
+
+        Args:
+            scope (str): "Whole World" or a region name.
+            period: A year, or AVERAGE for the 2010-2019 average.
+            k (int): Number of countries.
+
+        Returns:
+            pd.DataFrame: Columns Rank, Country and Happiness Score.
+        """
+        board = self._board(scope, period)
+        countries, scores = board.countries[:k], board.scores[:k]
+        return pd.DataFrame({RANK: np.arange(1, len(countries) + 1), COUNTRY: countries, HAPPINESS_SCORE: scores})
+
+    def bottom(self, scope=WORLD, period=AVERAGE, k=10):
+        """The `k` least happy countries of `scope` in `period`, least happy first.
+
+        Same arguments and columns as top; Rank still counts from the top.
+        """
+        board = self._board(scope, period)
+        countries, scores = board.low_countries[:k], board.low_scores[:k]
+        ranks = [board.ranks[country] for country in countries]
+        return pd.DataFrame({RANK: ranks, COUNTRY: countries, HAPPINESS_SCORE: scores})
+
+    def best(self, scope=WORLD, period=AVERAGE):
+        """Return (country, score) of the happiest country of `scope` in `period`."""
+        board = self._board(scope, period)
+        return board.countries[0], board.scores[0]
+
+    def worst(self, scope=WORLD, period=AVERAGE):
+        """Return (country, score) of the least happy country of `scope` in `period`."""
+        board = self._board(scope, period)
+        return board.low_countries[0], board.low_scores[0]
+
+    def rank(self, country, scope=WORLD, period=AVERAGE):
+        """Return (rank, number of ranked countries) of `country`, or None if it has no score."""
+        board = self._board(scope, period)
+        rank = board.ranks.get(country)
+        return None if rank is None else (rank, len(board))
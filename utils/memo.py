@@ -0,0 +1,73 @@
+"""
+Caching of results derived from DataStore datasets.
+
+Streamlit's legacy ``st.cache`` hashes every argument (whole DataFrames
+included) on every call, and unless output mutation is allowed it hashes the
+return value again to detect changes. Datasets in the DataStore already carry
+a version fingerprint derived from their source files, so a derived result
+can be cached under (dataset fingerprints, parameters): a lookup is a dict
+access on a tuple of short strings, and the cached object is returned as is,
+without copying. Callers must treat it as read-only.
+"""
+
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+
+from utils import metrics
+
+
+def memoize(*datasets, maxsize=64):
+    """Cache ``func(store, ...)`` per dataset version and parameters.
+
+    Args:
+        datasets: Names of the DataStore datasets the result depends on.
+        maxsize (int): Number of results kept, least recently used first out.
+            None keeps everything.
+
+    The decorated function gets ``cache_info()`` and ``cache_clear()`` like
+    functools.lru_cache. Parameters must be hashable.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        cache = OrderedDict()
+        lock = threading.RLock()
+        info = {"hits": 0, "misses": 0}
+
+        @functools.wraps(func)
+        def wrapper(store, *args, **kwargs):
+            # Normalize so f(store, 'a') and f(store, param='a') share an entry
+            bound = signature.bind(store, *args, **kwargs)
+            bound.apply_defaults()
+            params = tuple(bound.arguments.values())[1:]
+            key = tuple(store.fingerprint(name) for name in datasets) + params
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    info["hits"] += 1
+                    metrics.count("memo", func.__name__, True)
+                    return cache[key]
+                info["misses"] += 1
+                metrics.count("memo", func.__name__, False)
+
+                # Computed under the lock so concurrent sessions don't build it twice
+                result = func(*bound.args, **bound.kwargs)
+                cache[key] = result
+                if maxsize is not None and len(cache) > maxsize:
+                    cache.popitem(last=False)
+                return result
+
+        def cache_info():
+            with lock:
+                return dict(info, size=len(cache), maxsize=maxsize)
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,196 @@
+"""
+Timing spans and cache counters for page reruns.
+
+MultiPage.run wraps every page in a span; data loads, figure builds and other
+heavy steps open nested spans of kind "data", "figure" or "compute". At the end
+of a rerun the span tree is written as one JSON line to the ``utils.metrics``
+logger, and totals per page and span are kept in a process-wide registry
+together with cache hit/miss counters. Set METRICS_PORT to also serve the
+registry in Prometheus text format on http://localhost:METRICS_PORT/metrics.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+KINDS = ("data", "compute", "figure")
+
+_local = threading.local()
+_lock = threading.Lock()
+# (page, span, kind) -> [count, seconds]
+_spans = defaultdict(lambda: [0, 0.0])
+# (cache, name, result) -> count
+_cache_counts = defaultdict(int)
+# name -> callable returning {metric: value}, polled when rendering
+_gauges = {}
+
+
+class Span:
+    def __init__(self, name, kind, parent=None):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.children = []
+        self.seconds = 0.0
+
+    def self_seconds(self):
+        return self.seconds - sum(child.seconds for child in self.children)
+
+    def to_dict(self):
+        out = {"name": self.name, "kind": self.kind, "seconds": round(self.seconds, 6)}
+        if self.children:
+            out["children"] = [child.to_dict() for child in self.children]
+        return out
+
+
+def _current():
+    return getattr(_local, "span", None)
+
+
+@contextlib.contextmanager
+def span(name, kind="compute"):
+    """Time a block as a child of the enclosing span (if any).
+
+    Args:
+        name (str): Span name, e.g. "data:facts" or "figure:world_map".
+        kind (str): One of KINDS.
+    """
+    parent = _current()
+    current = Span(name, kind, parent)
+    if parent is not None:
+        parent.children.append(current)
+    _local.span = current
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        _local.span = parent
+
+
+def count(cache, name, hit):
+    """Record one lookup of `name` in `cache`."""
+    with _lock:
+        _cache_counts[(cache, name, "hit" if hit else "miss")] += 1
+
+
+def register_gauges(name, func):
+    """Export the numeric values of `func()` (a dict) as gauges named ``<name>_<key>``."""
+    _gauges[name] = func
+
+
+def _record(page, root):
+    """Fold a finished page span into the registry and return its summary."""
+    by_kind = dict.fromkeys(KINDS, 0.0)
+
+    def walk(node):
+        by_kind[node.kind] = by_kind.get(node.kind, 0.0) + node.self_seconds()
+        with _lock:
+            entry = _spans[(page, node.name, node.kind)]
+            entry[0] += 1
+            entry[1] += node.seconds
+        for child in node.children:
+            walk(child)
+
+    walk(root)
+    return {key: round(value, 6) for key, value in by_kind.items()}
+
+
+@contextlib.contextmanager
+def page_span(page):
+    """Span for a whole page rerun; logs it and updates the registry on exit."""
+    previous = _current()
+    _local.span = None
+    try:
+        with span(page, "compute") as root:
+            yield root
+    finally:
+        _local.span = previous
+        summary = _record(page, root)
+        logger.info(json.dumps({
+            "event": "rerun",
+            "page": page,
+            "seconds": round(root.seconds, 6),
+            "by_kind": summary,
+            "spans": root.to_dict().get("children", []),
+        }))
+
+
+def _labels(**labels):
+    return ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                    for key, value in labels.items())
+
+
+def render_prometheus():
+    """The registry in Prometheus text exposition format."""
+    lines = [
+        "# HELP happiness_span_seconds Time spent in a span, summed over reruns.",
+        "# TYPE happiness_span_seconds summary",
+    ]
+    with _lock:
+        spans = sorted(_spans.items())
+        counts = sorted(_cache_counts.items())
+    for (page, name, kind), (n, seconds) in spans:
+        labels = _labels(page=page, span=name, kind=kind)
+        lines.append(f"happiness_span_seconds_sum{{{labels}}} {seconds:.6f}")
+        lines.append(f"happiness_span_seconds_count{{{labels}}} {n}")
+
+    lines += [
+        "# HELP happiness_cache_lookups_total Cache lookups by cache, entry and result.",
+        "# TYPE happiness_cache_lookups_total counter",
+    ]
+    for (cache, name, result), n in counts:
+        lines.append(f"happiness_cache_lookups_total{{{_labels(cache=cache, name=name, result=result)}}} {n}")
+
+    for prefix, func in sorted(_gauges.items()):
+        for key, value in sorted(func().items()):
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE happiness_{prefix}_{key} gauge")
+                lines.append(f"happiness_{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def serve(port=METRICS_PORT):
+    """Start the /metrics endpoint once per process; a no-op when port is 0."""
+    global _server
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+            except OSError as e:
+                # Another process (e.g. a second Streamlit server) owns the port; don't retry every rerun
+                logger.warning("metrics endpoint not started on port %d: %s", port, e)
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+            logger.info("serving metrics on http://127.0.0.1:%d/metrics", port)
+    return _server or None
@@ -0,0 +1,95 @@
+"""
+Typed WHO mortality table, partitioned by sex and year.
+
+The WHO export carries 34 mostly descriptive columns per row. Ingestion keeps
+the five the pages use, under canonical country names and compact dtypes,
+sorted by (sex, year, country). MortalityTable indexes every (sex, year)
+partition by (country, year) once, so a read that filters on sex and years
+only touches the matching partitions, and joining the result onto the
+happiness panel is a keyed lookup.
+"""
+
+import pandas as pd
+
+from utils.constants import *
+from utils.countries import canonicalize
+
+SEX = "Sex"
+SUICIDE_RATE = "SuicideRatePer100000"
+BOTH_SEXES = "Both sexes"
+
+# Source column -> table column
+MORTALITY_COLUMNS = {
+    'Location': COUNTRY,
+    'ParentLocation': 'ParentLocation',
+    'Dim1': SEX,
+    'Period': YEAR,
+    'FactValueNumeric': SUICIDE_RATE,
+}
+
+
+def mortality_table(raw):
+    """Type and sort the raw WHO rows.
+
+    Args:
+        raw (pd.DataFrame): The sheet with at least the MORTALITY_COLUMNS.
+
+    Returns:
+        pd.DataFrame: Columns Country, ParentLocation, Sex, Year and
+            SuicideRatePer100000, sorted by sex, year and country.
+    """
+    table = raw[list(MORTALITY_COLUMNS)].rename(columns=MORTALITY_COLUMNS)
+    table[COUNTRY] = canonicalize(table[COUNTRY].str.strip(), 'mortality')
+    table = table.astype({
+        'ParentLocation': 'category',
+        SEX: 'category',
+        YEAR: 'int16',
+        SUICIDE_RATE: 'float64',
+    })
+    return table.sort_values([SEX, YEAR, COUNTRY], kind='stable').reset_index(drop=True)
+
+
+class MortalityTable:
+    """Suicide rates by country, one partition per (sex, year).
+
+    Args:
+        table (pd.DataFrame): A table from mortality_table.
+    """
+
+    def __init__(self, table):
+        self.columns = [SUICIDE_RATE, 'ParentLocation']
+        self.partitions = {
+            (sex, int(year)): part.set_index([COUNTRY, part[YEAR].astype(int)])[self.columns]
+            for (sex, year), part in table.groupby([SEX, YEAR], observed=True, sort=True)
+        }
+
+    def __len__(self):
+        return sum(len(part) for part in self.partitions.values())
+
+    @property
+    def nbytes(self):
+        return int(sum(part.memory_usage(index=True, deep=True).sum() for part in self.partitions.values()))
+
+    @property
+    def sexes(self):
+        return sorted({sex for sex, _ in self.partitions})
+
+    @property
+    def years(self):
+        return sorted({year for _, year in self.partitions})
+
+    def select(self, sex=BOTH_SEXES, years=None):
+        """Rates of one sex in `years` (all years by default), indexed by (country, year).
+
+        Only the matching partitions are read; an unknown sex or year yields
+        an empty frame.
+        """
+        wanted = None if years is None else {int(y) for y in years}
+        parts = [
+            part for (s, year), part in self.partitions.items()
+            if s == sex and (wanted is None or year in wanted)
+        ]
+        if not parts:
+            index = pd.MultiIndex.from_arrays([[], []], names=[COUNTRY, YEAR])
+            return pd.DataFrame(columns=self.columns, index=index)
+        return pd.concat(parts)
@@ -4,8 +4,12 @@ through an object oriented framework.
 """
 
 # Import necessary libraries 
+import importlib
+
 import streamlit as st
 
+from utils import metrics
+
 # Define the multipage class to manage the multiple apps in our program 
 class MultiPage: 
     """Framework for combining multiple streamlit applications."""
@@ -20,7 +24,9 @@ class MultiPage:
         Args:
             title ([str]): The title of page which we are adding to the list of apps 
             
-            func: Python function to render this page in Streamlit
+            func: Python function to render this page in Streamlit, or the dotted path of
+                the module defining it ("pages.dataset" for its ``app``, "pages.dataset:render"
+                for another name). A path is only imported when the page is first opened.
         """
 
         self.pages.append({
@@ -38,5 +44,19 @@ class MultiPage:
             format_func=lambda page: page['title']
         )
 
-        # run the app function 
-        page['function']()
+        # run the app function, timing it and everything it loads or draws
+        metrics.serve()
+        with metrics.page_span(page['title']):
+            self.load(page)()
+
+    @staticmethod
+    def load(page):
+        """Return the page's function, importing its module on first use."""
+        func = page['function']
+        if isinstance(func, str):
+            module, _, name = func.partition(':')
+            # Modules stay in sys.modules, so this costs once per process
+            with metrics.span(f'import:{module}', 'compute'):
+                func = getattr(importlib.import_module(module), name or 'app')
+            page['function'] = func
+        return func
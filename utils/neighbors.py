@@ -0,0 +1,86 @@
+"""
+Most similar country-years for the Prediction page.
+
+Every complete country-year of the happiness panel is a point in the space of
+the six model features, each standardized to zero mean and unit variance so
+that log GDP and life expectancy in years do not drown out the 0-1 ratios.
+A KD-tree over those points is built once per data version. A slider vector
+is then answered with a logarithmic-time tree search instead of a scan over
+every row, which keeps queries fast as the panel grows to subnational rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import *
+from utils.pca import FEATURES
+
+DISTANCE = "Distance"
+
+
+class NeighborIndex:
+    """k-nearest-neighbour search over the standardized features of a panel.
+
+    Args:
+        happiness (pd.DataFrame): The happiness panel; rows missing any
+            feature or the score are ignored.
+        leaf_size (int): KD-tree leaf size.
+    """
+
+    def __init__(self, happiness, leaf_size=40):
+        # Imported here so pages that never build the index do not load sklearn
+        from sklearn.neighbors import KDTree
+
+        df = happiness[[COUNTRY, YEAR] + FEATURES + [HAPPINESS_SCORE]].dropna()
+        X = df[FEATURES].to_numpy(dtype=float)
+        self.mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.tree = KDTree((X - self.mean) / self.scale, leaf_size=leaf_size)
+
+        self.countries = df[COUNTRY].to_numpy(dtype=object)
+        self.years = df[YEAR].to_numpy(dtype='int64')
+        self.scores = df[HAPPINESS_SCORE].to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self.scores)
+
+    @property
+    def nbytes(self):
+        data, index, nodes, bounds = self.tree.get_arrays()[:4]
+        tree = data.nbytes + index.nbytes + nodes.nbytes + bounds.nbytes
+        return tree + self.countries.nbytes + self.years.nbytes + self.scores.nbytes
+
+    def query_batch(self, X, k=5):
+        """Row positions and distances of the `k` nearest country-years of each query.
+
+        Args:
+            X: (n, len(FEATURES)) feature values in model units, ordered as FEATURES.
+            k (int): Neighbours per query; capped at the number of rows.
+
+        Returns:
+            tuple: (distances, positions), two (n, k) arrays sorted nearest
+                first; distances are in standard deviations.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        return self.tree.query((X - self.mean) / self.scale, k=min(k, len(self)))
+
+    def query(self, values, k=5):
+        """The `k` country-years most similar to one set of feature values.
+
+        Args:
+            values: Feature values in model units, ordered as FEATURES.
+            k (int): Number of country-years.
+
+        Returns:
+            pd.DataFrame: Columns Country, Year, Happiness Score and Distance,
+                nearest first.
+        """
+        distances, positions = self.query_batch([values], k)
+        rows = positions[0]
+        return pd.DataFrame({
+            COUNTRY: self.countries[rows],
+            YEAR: self.years[rows],
+            HAPPINESS_SCORE: self.scores[rows],
+            DISTANCE: distances[0],
+        })
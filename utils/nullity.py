@@ -0,0 +1,117 @@
+"""
+Bit-packed nullity index for the Dataset page.
+
+Presence of every metric of the happiness table is stored as bits over
+country x year x metric, packed along the year axis (one byte per eight
+years). Country counts, "good" countries (complete over a set of years) and
+per-year coverage are mask-and-compare operations on those bytes, and the
+missingno matrices are drawn from frames reconstructed from the bits, once
+per data version, then served as PNG bytes.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import *
+
+# Streamlit's widest content area in pixels; st.image decodes, resizes and
+# re-encodes anything wider on every call, and passes narrower PNGs through
+IMAGE_WIDTH = 1460
+
+
+class NullityIndex:
+    """Presence bits of a (country, year) keyed table.
+
+    Args:
+        df (pd.DataFrame): Table with one row per country and year, e.g. the
+            unfiltered happiness data.
+    """
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        self.metrics = [c for c in self.columns if c not in (COUNTRY, YEAR)]
+        self.countries, self.row_country = np.unique(df[COUNTRY].to_numpy(), return_inverse=True)
+        self.years, self.row_year = np.unique(df[YEAR].to_numpy(), return_inverse=True)
+
+        present = np.zeros((len(self.countries), len(self.years), len(self.metrics)), dtype=bool)
+        present[self.row_country, self.row_year] = df[self.metrics].notna().to_numpy()
+        self.bits = np.packbits(present, axis=1)
+
+    def __len__(self):
+        return len(self.row_country)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes + self.row_country.nbytes + self.row_year.nbytes
+
+    def _year_mask(self, years=None):
+        selected = np.ones(len(self.years), dtype=bool) if years is None else np.isin(self.years, list(years))
+        return np.packbits(selected)
+
+    def _metric_bits(self, metric):
+        return self.bits[:, :, self.metrics.index(metric)]
+
+    def presence(self, metric):
+        """Boolean (countries, years) presence of one metric."""
+        return np.unpackbits(self._metric_bits(metric), axis=1, count=len(self.years)).astype(bool)
+
+    def observed(self, metric, years=None):
+        """Countries with at least one value of `metric` in `years` (all years by default)."""
+        hit = self._metric_bits(metric) & self._year_mask(years)
+        return self.countries[hit.any(axis=1)]
+
+    def complete(self, metric, years=None):
+        """Observed countries with a value of `metric` in every year of `years` that has any data.
+
+        Matches ``pivot_table(index=COUNTRY, columns=YEAR, values=metric).dropna()``:
+        years in which no country has a value are not pivot columns, so they
+        are not required.
+        """
+        mask = self._year_mask(years)
+        bits = self._metric_bits(metric)
+        mask &= np.bitwise_or.reduce(bits, axis=0)
+        hit = bits & mask
+        return self.countries[(hit == mask).all(axis=1) & hit.any(axis=1)]
+
+    def coverage(self, metric):
+        """Number of countries with a value of `metric`, per year."""
+        return pd.Series(self.presence(metric).sum(axis=0), index=self.years, name=metric)
+
+    def table_nullity(self):
+        """The original table's shape and column order, 1.0 where a value exists, NaN where not."""
+        present = np.unpackbits(self.bits, axis=1, count=len(self.years)).astype(bool)
+        values = np.where(present[self.row_country, self.row_year], 1.0, np.nan)
+        frame = pd.DataFrame(values, columns=self.metrics)
+        frame[COUNTRY] = 1.0
+        frame[YEAR] = 1.0
+        return frame[self.columns]
+
+    def pivot_nullity(self, metric):
+        """Nullity of ``pivot_table(index=COUNTRY, columns=YEAR, values=metric).reset_index()``."""
+        present = self.presence(metric)
+        rows, cols = present.any(axis=1), present.any(axis=0)
+        frame = pd.DataFrame(np.where(present[rows][:, cols], 1.0, np.nan), columns=self.years[cols])
+        frame.insert(0, COUNTRY, 1.0)
+        return frame
+
+
+def render_matrix(frame, width=IMAGE_WIDTH):
+    """PNG bytes of missingno.matrix(frame), at most `width` pixels wide.
+
+    The resolution is chosen so the tightly cropped figure fits `width`, so
+    st.image can serve the bytes without resizing them.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import missingno
+
+    fig = missingno.matrix(frame).figure
+    # Tight bounding box in inches, plus savefig's default 0.1in padding on each side
+    inches = fig.get_tightbbox(fig.canvas.get_renderer()).width + 0.2
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=min(200, int(width / inches)))
+    plt.close(fig)
+    return buf.getvalue()
@@ -0,0 +1,265 @@
+"""
+PCA engine for the PCA page.
+
+Three ways to get the principal components of the min-max scaled survey
+features:
+
+- ``exact``: eigendecomposition of the full covariance matrix (what the page
+  always did).
+- ``IncrementalPCA``: keeps the running mean, scatter matrix and range of
+  the unscaled features, so a new survey wave is folded in with
+  ``partial_fit`` instead of a full refit. The min-max scaling is applied
+  when the components are computed, so a wave that widens a feature's range
+  still gives the same result as scaling and refitting everything.
+- ``randomized``: randomized SVD of the centered data, for feature sets far
+  wider than the six WHR factors.
+
+Fitted results are cached per (data version, mode, components), so reruns of
+the page only pay for plotting. The incremental mode also keeps one fit per
+process across data versions: a version that only adds survey waves folds
+just those in (see fold_wave).
+"""
+
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import metrics
+from utils.memo import memoize
+from utils.constants import *
+
+FEATURES = [LOG_GDP, SOCIAL_SUPPORT, LIFE_EXPECTANCY, FREEDOM, GENEROSITY, CORRUPTION]
+
+
+class PCAResult:
+    """Principal axes sorted by decreasing explained variance.
+
+    Attributes:
+        components (np.ndarray): Eigenvectors as columns, shape (features, k).
+        explained_variance (np.ndarray): Eigenvalues of the kept components.
+        explained_variance_ratio (np.ndarray): Share of the total variance per component.
+    """
+
+    def __init__(self, components, explained_variance, total_variance):
+        self.components = components
+        self.explained_variance = explained_variance
+        self.explained_variance_ratio = explained_variance / total_variance
+
+    @property
+    def cumulative_ratio(self):
+        return np.cumsum(self.explained_variance_ratio)
+
+    def transform(self, X, k=None):
+        """Project X onto the first k components (no mean centering, as the page always did)."""
+        return np.dot(X, self.components[:, :k])
+
+
+def _from_covariance(cov, n_components=None):
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    # sort the eigenvalues from highest to lowest
+    sorted_idx = np.argsort(eigenvalues)[::-1][:n_components]
+    return PCAResult(eigenvectors[:, sorted_idx], eigenvalues[sorted_idx], np.sum(eigenvalues))
+
+
+def fit_exact(X, n_components=None):
+    return _from_covariance(np.cov(X, rowvar=False), n_components)
+
+
+def fit_randomized(X, n_components, oversample=10, n_iter=4, seed=0):
+    """Randomized SVD (Halko et al.) of the centered data.
+
+    Only the top `n_components` are recovered; the total variance still comes
+    from the exact column variances so the explained ratios are comparable
+    with fit_exact.
+    """
+    X = np.asarray(X, dtype=float)
+    Xc = X - X.mean(axis=0)
+    rng = np.random.default_rng(seed)
+    k = min(n_components + oversample, min(Xc.shape))
+
+    Q = np.linalg.qr(Xc @ rng.standard_normal((Xc.shape[1], k)))[0]
+    for _ in range(n_iter):
+        Q = np.linalg.qr(Xc.T @ Q)[0]
+        Q = np.linalg.qr(Xc @ Q)[0]
+    _, s, vt = np.linalg.svd(Q.T @ Xc, full_matrices=False)
+
+    n = len(Xc)
+    explained = s[:n_components] ** 2 / (n - 1)
+    total = Xc.var(axis=0, ddof=1).sum()
+    return PCAResult(vt[:n_components].T, explained, total)
+
+
+class IncrementalPCA:
+    """PCA of min-max scaled data that arrives in batches, e.g. one survey wave at a time.
+
+    The running mean and scatter matrix of the unscaled rows are merged with
+    Chan's pairwise update, and the running minimum and maximum of each
+    feature are tracked alongside. Scaling is a per-feature affine map, so
+    ``result()`` rescales the covariance by the current ranges and equals
+    fit_exact on all rows seen so far, min-max scaled over those rows.
+
+    Attributes:
+        waves (dict): Digest of every batch folded in with a key, see fold_wave.
+    """
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.scatter = np.zeros((n_features, n_features))
+        self.low = np.full(n_features, np.inf)
+        self.high = np.full(n_features, -np.inf)
+        self.waves = {}
+
+    def partial_fit(self, X):
+        """Fold in a batch of unscaled rows."""
+        X = np.asarray(X, dtype=float)
+        m = len(X)
+        if m == 0:
+            return self
+        batch_mean = X.mean(axis=0)
+        centered = X - batch_mean
+        delta = batch_mean - self.mean
+        total = self.n + m
+
+        self.scatter += centered.T @ centered + np.outer(delta, delta) * self.n * m / total
+        self.mean += delta * m / total
+        self.n = total
+        self.low = np.minimum(self.low, X.min(axis=0))
+        self.high = np.maximum(self.high, X.max(axis=0))
+        return self
+
+    def scale(self, X):
+        """Min-max scale unscaled rows by the range of all rows seen so far."""
+        return (X - self.low) / (self.high - self.low)
+
+    def result(self, n_components=None):
+        span = self.high - self.low
+        return _from_covariance(self.scatter / (self.n - 1) / np.outer(span, span), n_components)
+
+
+def _wave_digest(X):
+    return hashlib.sha1(np.ascontiguousarray(X, dtype=float).tobytes()).hexdigest()
+
+
+# Incremental fit kept across data versions, see fold_wave
+_wave_fit = None
+_wave_lock = threading.RLock()
+
+
+def fold_wave(key, X):
+    """Fold one survey wave into the process-wide incremental fit.
+
+    A wave already folded in under `key` with the same rows is skipped, so
+    calling this for every wave of a new data version only pays for the new
+    ones.
+
+    Args:
+        key: Identifies the wave, e.g. its survey year.
+        X: Unscaled FEATURES rows of the wave.
+
+    Returns:
+        IncrementalPCA: The shared fit, which later calls keep updating.
+
+    Raises:
+        ValueError: If a wave with different rows was already folded in under
+            `key`; a wave cannot be taken back out, so the waves have to be
+            refitted together (cached_projection does so on a new data version).
+    """
+    global _wave_fit
+    X = np.asarray(X, dtype=float)
+    digest = _wave_digest(X)
+    with _wave_lock:
+        if _wave_fit is None:
+            _wave_fit = IncrementalPCA(X.shape[1])
+        if _wave_fit.waves.get(key, digest) != digest:
+            raise ValueError(f"Wave {key!r} was already folded in with different rows")
+        if key not in _wave_fit.waves:
+            _wave_fit.partial_fit(X)
+            _wave_fit.waves[key] = digest
+        return _wave_fit
+
+
+def _fold_waves(waves):
+    # Sync the shared fit to exactly `waves` ({key: rows}): new waves are folded
+    # in, and a changed or dropped wave restarts the fit with all of them
+    global _wave_fit
+    if not waves:
+        raise ValueError("No survey waves to fit")
+    waves = {key: np.asarray(X, dtype=float) for key, X in waves.items()}
+    digests = {key: _wave_digest(X) for key, X in waves.items()}
+    with _wave_lock:
+        if _wave_fit is not None and any(
+            digests.get(key) != digest for key, digest in _wave_fit.waves.items()
+        ):
+            _wave_fit = None
+        if _wave_fit is None:
+            _wave_fit = IncrementalPCA(next(iter(waves.values())).shape[1])
+        for key, X in waves.items():
+            if key not in _wave_fit.waves:
+                _wave_fit.partial_fit(X)
+                _wave_fit.waves[key] = digests[key]
+        return _wave_fit
+
+
+def feature_rows(happiness, countries):
+    """Rows with every feature and score present: their unscaled features and continents."""
+    df_raw = happiness[[COUNTRY] + FEATURES + [HAPPINESS_SCORE]].dropna()
+    merged = df_raw.merge(countries[[COUNTRY, REGION]], on=COUNTRY, how='left')
+    return df_raw[FEATURES], merged[REGION]
+
+
+def prepare_features(happiness, countries):
+    """Rows with every feature and score present, their min-max scaled features, and continents."""
+    df, continents = feature_rows(happiness, countries)
+    scaled = (df - np.min(df, axis=0)) / (np.max(df, axis=0) - np.min(df, axis=0))
+    return scaled, continents
+
+
+class PCAProjection:
+    """A fitted PCA plus the page's projected rows, cached under a data version."""
+
+    def __init__(self, result, data):
+        self.result = result
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        return int(self.data.memory_usage(deep=True).sum()) + self.result.components.nbytes
+
+
+@memoize('happiness', 'countries')
+def cached_projection(store, mode='exact', n_components=3):
+    """Fit (once per data version) and project the happiness panel.
+
+    Args:
+        store (DataStore): Source of the happiness and country data.
+        mode (str): 'exact', 'incremental' (one batch per survey year) or 'randomized'.
+        n_components (int): Number of components to keep and project onto.
+
+    Returns:
+        PCAProjection: Projected rows in columns 0..n_components-1 plus 'Continent'.
+    """
+    scaled, continents = prepare_features(store.happiness, store.countries)
+    with metrics.span(f'compute:pca_{mode}', 'compute'):
+        if mode == 'exact':
+            result = fit_exact(scaled, n_components)
+        elif mode == 'randomized':
+            result = fit_randomized(scaled, n_components)
+        elif mode == 'incremental':
+            # Waves of unscaled rows; only those the shared fit has not seen are folded in
+            raw, _ = feature_rows(store.happiness, store.countries)
+            years = store.happiness.loc[raw.index, YEAR]
+            waves = {year: wave.to_numpy(dtype=float) for year, wave in raw.groupby(years)}
+            with _wave_lock:
+                result = _fold_waves(waves).result(n_components)
+        else:
+            raise ValueError(f"Unknown PCA mode: {mode}")
+
+        data = pd.DataFrame(result.transform(scaled))
+        data['Continent'] = continents.values
+    return PCAProjection(result, data)
@@ -0,0 +1,152 @@
+"""
+Happiness score regression for the Prediction page.
+
+The linear model and a sorted copy of the observed scores are built once per
+data version. A slider change then costs one prediction on a preallocated
+feature vector and a binary search for the country with the closest score,
+independent of the panel size.
+
+feature_matrix turns indicator values as users enter them (GDP per capita
+rather than its log, ratios on the sliders' 0-10 scale) into model inputs,
+for both the page and the batch scorer.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import metrics
+from utils.memo import memoize
+from utils.constants import *
+from utils.pca import FEATURES
+
+# Features the survey reports as 0-1 ratios
+RATIOS = [SOCIAL_SUPPORT, FREEDOM, GENEROSITY, CORRUPTION]
+
+
+def feature_matrix(values, ratio_scale=1):
+    """The (n, len(FEATURES)) model input for indicator values.
+
+    Args:
+        values: DataFrame, or dict of scalars or arrays, with a column per
+            feature. When Log GDP per capita is absent, a GDP per capita
+            column is log-transformed; non-positive GDP gives NaN.
+        ratio_scale (float): Scale the ratio features (RATIOS) are given on,
+            e.g. 10 for the Prediction page's 0-10 sliders.
+
+    Returns:
+        np.ndarray: Float rows ordered as FEATURES.
+
+    Raises:
+        ValueError: If a feature column is missing.
+    """
+    if isinstance(values, pd.DataFrame):
+        df = values
+    else:
+        df = pd.DataFrame({name: np.atleast_1d(value) for name, value in values.items()})
+    if LOG_GDP not in df and GDP in df:
+        gdp = df[GDP].astype(float)
+        df = df.assign(**{LOG_GDP: np.log(gdp.where(gdp > 0))})
+    missing = [f for f in FEATURES if f not in df]
+    if missing:
+        raise ValueError(f"Input is missing feature columns: {missing}")
+    X = df[FEATURES].to_numpy(dtype=float)
+    if ratio_scale != 1:
+        X[:, [FEATURES.index(f) for f in RATIOS]] /= ratio_scale
+    return X
+
+
+class HappinessModel:
+    """Linear regression of the happiness score on the six WHR factors.
+
+    Args:
+        happiness (pd.DataFrame): The happiness panel; rows missing any
+            feature or the score are ignored.
+    """
+
+    def __init__(self, happiness):
+        # Imported here so importing this module (e.g. for feature_matrix) does not load sklearn
+        from sklearn.linear_model import LinearRegression
+
+        df = happiness[[COUNTRY] + FEATURES + [HAPPINESS_SCORE]].dropna()
+        X = df[FEATURES].to_numpy(dtype=float)
+        scores = df[HAPPINESS_SCORE].to_numpy(dtype=float)
+        self.reg = LinearRegression().fit(X, scores)
+
+        log_gdp = df[LOG_GDP].to_numpy(dtype=float)
+        self.gdp_bounds = (
+            int(np.exp(np.min(log_gdp))),
+            int(np.exp(np.max(log_gdp))),
+            int(np.exp(np.median(log_gdp))),
+        )
+
+        # Stable sort: equal scores keep panel order, so ties resolve to the first row
+        self.order = np.argsort(scores, kind='stable')
+        self.scores = scores[self.order]
+        self.countries = df[COUNTRY].to_numpy()[self.order]
+
+        self._x = np.empty((1, len(FEATURES)))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.scores)
+
+    @property
+    def nbytes(self):
+        return self.scores.nbytes + self.order.nbytes + self.countries.nbytes
+
+    def predict(self, values):
+        """Predicted score for one set of feature values, ordered as FEATURES."""
+        with self._lock:
+            self._x[0] = values
+            return float(self.reg.predict(self._x)[0])
+
+    def nearest(self, score):
+        """Return (country, score) of the observation closest to `score`.
+
+        Ties go to the earliest row of the panel, like a linear scan would.
+        """
+        i = int(np.searchsorted(self.scores, score, side='left'))
+        candidates = []
+        if i < len(self.scores):
+            candidates.append(i)
+        if i > 0:
+            # First row of the run of equal scores just below
+            candidates.append(int(np.searchsorted(self.scores, self.scores[i - 1], side='left')))
+        best = min(candidates, key=lambda j: (abs(score - self.scores[j]), self.order[j]))
+        return self.countries[best], self.scores[best]
+
+    def predict_batch(self, X):
+        """Vectorized predict for an (n, len(FEATURES)) array; rows with NaNs give NaN."""
+        X = np.asarray(X, dtype=float)
+        out = np.full(len(X), np.nan)
+        valid = ~np.isnan(X).any(axis=1)
+        if valid.any():
+            out[valid] = self.reg.predict(X[valid])
+        return out
+
+    def nearest_batch(self, scores):
+        """Vectorized nearest: (countries, scores) arrays, None/NaN where `scores` is NaN."""
+        scores = np.asarray(scores, dtype=float)
+        n = len(self.scores)
+        i = np.searchsorted(self.scores, scores, side='left')
+        right = np.minimum(i, n - 1)
+        left = np.searchsorted(self.scores, self.scores[np.maximum(i - 1, 0)], side='left')
+
+        d_right = np.where(i < n, np.abs(scores - self.scores[right]), np.inf)
+        d_left = np.where(i > 0, np.abs(scores - self.scores[left]), np.inf)
+        take_left = (d_left < d_right) | ((d_left == d_right) & (self.order[left] < self.order[right]))
+        best = np.where(take_left, left, right)
+
+        missing = np.isnan(scores)
+        countries = np.where(missing, None, self.countries[best])
+        return countries, np.where(missing, np.nan, self.scores[best])
+
+
+@memoize('happiness')
+def cached_model(store):
+    """The HappinessModel for the current happiness data, fitted once per data version."""
+    happiness = store.happiness
+    with metrics.span('compute:regression_fit', 'compute'):
+        return HappinessModel(happiness)
@@ -0,0 +1,134 @@
+"""
+Datasets shared between app processes through memory-mapped files.
+
+Every Streamlit process on a host used to hold a private copy of every
+dataset. With SHARED_DATASETS set to a directory, the first process to load
+or build a dataset publishes it there, in a file named after the dataset's
+fingerprint. Every other process memory-maps that file instead of reading or
+building the dataset. Publishing a new version deletes the files of older
+ones; processes still mapping those keep their mapping until they exit.
+
+A file holds the dataset pickled with protocol 5, with its NumPy buffers
+(DataFrame blocks, categorical codes, the arrays of index structures such
+as the correlation prefix sums) stored out of band and 64-byte aligned.
+Loading rebuilds the objects around views of the mapping, so those arrays
+point straight into the page cache, which the kernel shares between
+processes. Only object (string) arrays and small bookkeeping are
+materialized per process.
+
+Attached arrays are read-only; writing into one raises ValueError
+("assignment destination is read-only"). Code deriving new frames from them
+works unchanged, since pandas operations return new arrays. The directory
+is trusted like the snapshot directory: its files are unpickled.
+"""
+
+import json
+import mmap
+import os
+import pickle
+import struct
+
+SHARED_DIR = os.environ.get("SHARED_DATASETS")
+
+_MAGIC = b"HAPPYSH1"
+_HEADER = struct.Struct("<8sQ")  # magic, length of the JSON layout that follows
+_ALIGN = 64
+
+
+def _path(root, name, fingerprint):
+    return os.path.join(root, f"{name}-{fingerprint[:16]}.shared")
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def publish(obj, name, fingerprint, root=None):
+    """Write `obj` where other processes can attach it.
+
+    Concurrent publishers of the same version write identical files, and
+    each one is moved into place atomically. Files of other versions of the
+    dataset are then deleted.
+
+    Args:
+        obj: The dataset as this process stores it (a DataFrame or index structure).
+        name (str): Dataset name.
+        fingerprint (str): The dataset's version key.
+        root (str): Directory; SHARED_DIR by default.
+
+    Returns:
+        str: The published path, or None if `obj` cannot be pickled.
+    """
+    root = root or SHARED_DIR
+    buffers = []
+    try:
+        payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    raws = [buffer.raw() for buffer in buffers]
+
+    # Layout offsets are relative to the end of the header, known once it is serialized
+    spans, offset = [], _aligned(len(payload))
+    for raw in raws:
+        spans.append([offset, raw.nbytes])
+        offset = _aligned(offset + raw.nbytes)
+    layout = json.dumps({"payload": len(payload), "buffers": spans}).encode()
+    start = _aligned(_HEADER.size + len(layout))
+
+    os.makedirs(root, exist_ok=True)
+    path = _path(root, name, fingerprint)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(layout)) + layout)
+        f.seek(start)
+        f.write(payload)
+        for (at, _), raw in zip(spans, raws):
+            f.seek(start + at)
+            f.write(raw)
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+    _remove_superseded(root, name, path)
+    return path
+
+
+def _remove_superseded(root, name, path):
+    current = os.path.basename(path)
+    for entry in os.listdir(root):
+        # Same name and fingerprint length, so "facts" never matches "facts_pivot" files
+        if entry != current and entry.startswith(f"{name}-") and entry.endswith(".shared") \
+                and len(entry) == len(current):
+            try:
+                os.remove(os.path.join(root, entry))
+            except FileNotFoundError:
+                # Removed by another publisher
+                pass
+
+
+def attach(name, fingerprint, root=None):
+    """Memory-map a published dataset.
+
+    Args:
+        name (str): Dataset name.
+        fingerprint (str): The version this process expects.
+        root (str): Directory; SHARED_DIR by default.
+
+    Returns:
+        The dataset with its arrays backed by the shared file, or None if
+            that version has not been published.
+    """
+    path = _path(root or SHARED_DIR, name, fingerprint)
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+    view = memoryview(mapping)
+    magic, size = _HEADER.unpack_from(view)
+    if magic != _MAGIC:
+        return None
+    layout = json.loads(bytes(view[_HEADER.size:_HEADER.size + size]))
+    start = _aligned(_HEADER.size + size)
+    # The rebuilt arrays hold views of the mapping, which keeps it open
+    buffers = [view[start + at:start + at + nbytes] for at, nbytes in layout["buffers"]]
+    return pickle.loads(view[start:start + layout["payload"]], buffers=buffers)
@@ -0,0 +1,226 @@
+"""
+On-disk snapshots of the cleaned datasets.
+
+The first call of a snapshotted loader writes every frame it returns to an
+Arrow IPC file. Later calls (including in fresh processes) memory-map those
+files instead of re-parsing the Excel/CSV sources. A snapshot is invalidated
+when the module defining the loader, utils.constants (the column names and
+thresholds every loader uses) or a helper module it lists is edited, or
+when one of its source files changes; mtime and size are checked first and a file is only re-hashed when
+those differ.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+
+import pyarrow as pa
+
+from utils import constants, metrics
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", ".snapshots")
+SNAPSHOT_VERSION = 1
+
+# Code every loader depends on, hashed into every snapshot's key
+COMMON_CODE = (constants,)
+
+# Key under which the original (possibly non-string) column labels are stored
+_COLUMNS_KEY = b"snapshot.columns"
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_state(path):
+    stat = os.stat(path)
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
+
+
+def _write_frame(df, path):
+    """Write a frame as Arrow IPC, falling back to pickle for mixed-type columns."""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        with open(path + ".pkl", "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return os.path.basename(path) + ".pkl"
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[_COLUMNS_KEY] = pickle.dumps(df.columns)
+    table = table.replace_schema_metadata(metadata)
+    with pa.OSFile(path + ".arrow", "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return os.path.basename(path) + ".arrow"
+
+
+def _read_frame(path):
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    df = table.to_pandas()
+    columns = (table.schema.metadata or {}).get(_COLUMNS_KEY)
+    if columns is not None:
+        df.columns = pickle.loads(columns)
+    return df
+
+
+class Snapshot:
+    """A directory holding the frames returned by one loader plus a manifest."""
+
+    def __init__(self, name, sources, code_hash, root=None):
+        self.name = name
+        self.sources = list(sources)
+        self.code_hash = code_hash
+        self.path = os.path.join(root or SNAPSHOT_DIR, name)
+        self.manifest_path = os.path.join(self.path, "manifest.json")
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self):
+        manifest = self._load_manifest()
+        if manifest is None:
+            return False
+        if manifest.get("version") != SNAPSHOT_VERSION or manifest.get("code") != self.code_hash:
+            return False
+        if sorted(manifest["sources"]) != sorted(self.sources):
+            return False
+
+        touched = False
+        for path in self.sources:
+            recorded = manifest["sources"][path]
+            state = _source_state(path)
+            if state["mtime"] == recorded["mtime"] and state["size"] == recorded["size"]:
+                continue
+            # mtime or size moved: only a content change invalidates the snapshot
+            if state["size"] != recorded["size"] or file_digest(path) != recorded["sha1"]:
+                return False
+            recorded.update(state)
+            touched = True
+
+        if touched:
+            self._save_manifest(manifest)
+        return True
+
+    def read(self):
+        manifest = self._load_manifest()
+        if manifest is None:
+            raise FileNotFoundError(self.manifest_path)
+        frames = [_read_frame(os.path.join(self.path, f)) for f in manifest["frames"]]
+        return tuple(frames) if manifest["tuple"] else frames[0]
+
+    def write(self, result):
+        """Replace the snapshot with `result`.
+
+        The frames and manifest are written to a private directory that is
+        then renamed into place, so other processes see either the old
+        snapshot, the new one, or none (and re-read the sources), never a
+        partly written one.
+        """
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        old = f"{self.path}.{os.getpid()}.old"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            is_tuple = isinstance(result, tuple)
+            frames = result if is_tuple else (result,)
+            files = [_write_frame(df, os.path.join(tmp, str(i))) for i, df in enumerate(frames)]
+
+            sources = {}
+            for path in self.sources:
+                sources[path] = dict(_source_state(path), sha1=file_digest(path))
+            self._save_manifest({
+                "version": SNAPSHOT_VERSION,
+                "code": self.code_hash,
+                "sources": sources,
+                "frames": files,
+                "tuple": is_tuple,
+            }, os.path.join(tmp, "manifest.json"))
+
+            # A directory can only be renamed over an empty one, so move the old snapshot aside first
+            if os.path.isdir(self.path):
+                os.replace(self.path, old)
+            os.replace(tmp, self.path)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+            shutil.rmtree(old, ignore_errors=True)
+
+    def _save_manifest(self, manifest, path=None):
+        path = path or self.manifest_path
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)
+
+    def fingerprint(self):
+        """Version key of the current sources: code hash plus source hashes.
+
+        The hashes recorded in the manifest are only reused once is_valid has
+        checked them against the files (by mtime and size, re-hashing on a
+        mismatch); otherwise the sources are hashed afresh, so an edited
+        source never keeps an old key.
+        """
+        manifest = self._load_manifest() if self.is_valid() else None
+        if manifest is not None:
+            digests = [manifest["sources"][path]["sha1"] for path in sorted(self.sources)]
+        else:
+            digests = [file_digest(path) for path in sorted(self.sources)]
+        return hashlib.sha1("".join([self.code_hash] + digests).encode()).hexdigest()
+
+
+def snapshot(*sources, code=()):
+    """Decorator caching a loader's DataFrame (or tuple of DataFrames) on disk.
+
+    Args:
+        sources: Paths of the data files the loader reads. Changing any of
+            them invalidates the snapshot.
+        code: Modules, functions or classes defined outside the loader's
+            module that shape its result; editing the file defining any of
+            them also invalidates the snapshot. COMMON_CODE is always included.
+    """
+    def decorator(func):
+        # Hash the whole defining module so edits to helpers it calls also count
+        paths = dict.fromkeys(inspect.getsourcefile(obj) for obj in (func,) + COMMON_CODE + tuple(code))
+        code_hash = hashlib.sha1("".join(file_digest(path) for path in paths).encode()).hexdigest()
+
+        @functools.wraps(func)
+        def wrapper():
+            snap = Snapshot(func.__name__, sources, code_hash)
+            if snap.is_valid():
+                try:
+                    result = snap.read()
+                    metrics.count("snapshot", func.__name__, True)
+                    return result
+                except (OSError, ValueError, EOFError, pickle.UnpicklingError, pa.ArrowInvalid):
+                    # Replaced by another process mid-read; fall back to the sources
+                    pass
+            metrics.count("snapshot", func.__name__, False)
+            result = func()
+            try:
+                snap.write(result)
+            except OSError:
+                # A read-only checkout still works, it just never gets faster
+                pass
+            return result
+
+        wrapper.snapshot = lambda: Snapshot(func.__name__, sources, code_hash)
+        return wrapper
+
+    return decorator